@@ -5,13 +5,23 @@ import glob
 import subprocess
 import threading
 import datetime
+import sys
 import pandas as pd
 from apscheduler.schedulers.background import BackgroundScheduler
-from python.scrapers import company_data
-from python import scraper
-from python.ath_runner import run_ath_analysis
 from flask_cors import CORS
 
+# python/ is the one import root, as in the scripts run from there: importing
+# its modules as python.* too would load a second copy of every shared
+# session, limiter and lock. It goes first so python/scraper.py wins over the
+# PyPI `scraper` package in site-packages.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from scrapers import company_data
+import scraper
+from ath_runner import run_ath_analysis, run_ath_backfill
+from news_runner import run_news_cycle, load_report
+from jobs import JobManager
+
 app = Flask(
     __name__,
     template_folder='../frontend/templates',
@@ -25,15 +35,13 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PORTFOLIO_FILE = os.path.join(SCRIPT_DIR, 'user_portfolio.csv')
 LAST_UPDATED_DATA_FILE = os.path.join(SCRIPT_DIR, 'last_updated_data.txt')
 LAST_UPDATED_NEWS_FILE = os.path.join(SCRIPT_DIR, 'last_updated_news.txt')
+ATH_CSV_DIR = os.path.join(SCRIPT_DIR, 'csv')
+
+# === Background Jobs ===
+ath_jobs = JobManager()
 
 # === Locks ===
 SCRIPT_LOCK = threading.Lock()
-NEWS_SCRIPTS_WHITELIST = [
-    'business_line.py', 'business_std.py', 'cnbctv_18.py',
-    'econ_times.py', 'fin_exp.py', 'ft.py',
-    'investing.py', 'money_control.py', 'ndtvprofit.py'
-]
-NEWS_SCRIPT_LOCKS = {script: threading.Lock() for script in NEWS_SCRIPTS_WHITELIST}
 
 # === Helper Functions ===
 def set_last_updated(file):
@@ -47,41 +55,16 @@ def get_last_updated(file):
         return f.read().strip()
     
 def latest_ath_file():
+    if not os.path.isdir(ATH_CSV_DIR):
+        return None
     files = [
-        f for f in os.listdir('python')
+        f for f in os.listdir(ATH_CSV_DIR)
         if f.startswith("ATH_companies_with_market_cap_") and f.endswith(".csv")
     ]
     if not files:
         return None
-    latest = max(files, key=lambda f: os.path.getmtime(os.path.join("python", f)))
-    return os.path.join("python", latest)
-
-def run_cleaner():
-    logs = []
-    cleaner_script = os.path.join('cleaner.py')
-    if os.path.exists(os.path.join('python', 'cleaner.py')):
-        logs.append("[INFO] Running cleaner.py...")
-        try:
-            result = subprocess.run(
-                ['python', 'cleaner.py'],
-                cwd='python',
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True
-            )
-            logs.append("[SUCCESS] cleaner.py completed.")
-            if result.stdout:
-                logs.append(result.stdout)
-            if result.stderr:
-                logs.append(f"[STDERR] {result.stderr}")
-        except subprocess.CalledProcessError as e:
-            logs.append(f"[ERROR] cleaner.py failed with code {e.returncode}")
-            logs.append(e.stdout or "")
-            logs.append(f"[STDERR] {e.stderr or ''}")
-    else:
-        logs.append("[WARNING] cleaner.py not found.")
-    return logs
+    latest = max(files, key=lambda f: os.path.getmtime(os.path.join(ATH_CSV_DIR, f)))
+    return os.path.join(ATH_CSV_DIR, latest)
 
 def run_python_script(script_path):
     logs = []
@@ -90,8 +73,7 @@ def run_python_script(script_path):
         logs.append(f"[ERROR] Script not found: {script_path}")
         return logs
 
-    lock = NEWS_SCRIPT_LOCKS.get(script_name, SCRIPT_LOCK)
-    with lock:
+    with SCRIPT_LOCK:
         logs.append(f"[INFO] Running: {script_path}")
         try:
             script_dir = os.path.dirname(script_path)
@@ -146,29 +128,48 @@ def run_all_data_scripts():
 
 def run_all_news_scripts():
     logs = []
-    news_folder = os.path.join('python', 'news')
-    scripts = [
-        os.path.join(news_folder, s) for s in NEWS_SCRIPTS_WHITELIST
-        if os.path.exists(os.path.join(news_folder, s))
-    ]
+    report = run_news_cycle()
 
-    if not scripts:
-        logs.append("[WARNING] No news scripts found to run.")
+    if not report["sources"]:
+        logs.append("[WARNING] No news sources found to run.")
         return logs
 
-    logs.append(f"[INFO] Found {len(scripts)} news scripts to run.")
-
-    for script in scripts:
-        logs.append(f"[INFO] Running news script: {script}")
-        logs.extend(run_python_script(script))
+    logs.append(f"[INFO] Ran {len(report['sources'])} news sources, up to {report['parallelism']} at a time.")
+    for source in report["sources"]:
+        if source["status"] == "ok":
+            logs.append(f"[SUCCESS] {source['module']} completed in {source['duration']}s ({source['items']} new items).")
+        else:
+            logs.append(f"[ERROR] {source['module']} {source['status']}: {source['error']} ({source['duration']}s).")
 
-        logs.append("[INFO] Running cleaner after news script.")
-        logs.extend(run_cleaner())
+    cleaner = report["cleaner"]
+    if cleaner["status"] == "ok":
+        logs.append(f"[SUCCESS] News cleaner completed in {cleaner['duration']}s.")
+    else:
+        logs.append(f"[ERROR] News cleaner failed: {cleaner['error']}")
 
     set_last_updated(LAST_UPDATED_NEWS_FILE)
-    logs.append("[INFO] All news scripts (and cleaning) complete.")
+    logs.append(f"[INFO] All news sources (and cleaning) complete in {report['duration']}s.")
     return logs
 
+# === ATH Jobs ===
+def refresh_ath_job(target_date, progress=None):
+    output_file = run_ath_analysis(target_date, progress=progress)
+    if not os.path.exists(os.path.join(ATH_CSV_DIR, output_file)):
+        raise Exception(f"ATH refresh finished without writing {output_file}")
+    return {"file": output_file}
+
+def backfill_ath_job(target_dates, progress=None):
+    output_files = run_ath_backfill(target_dates=target_dates, progress=progress)
+    return {"files": [f for f in output_files if os.path.exists(os.path.join(ATH_CSV_DIR, f))]}
+
+def job_response(job, created, description):
+    return jsonify({
+        "message": f"{description} {job.status}" if created else f"{description} already {job.status}",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}",
+        "job": job.to_dict()
+    }), 202
+
 # === Company Scraper (Portfolio Changes) ===
 def run_company_scrapers_async():
     def target():
@@ -332,6 +333,13 @@ def refresh_news_sync():
         "last_updated_news": get_last_updated(LAST_UPDATED_NEWS_FILE)
     })
 
+@app.route('/api/news-run-report', methods=['GET'])
+def news_run_report():
+    report = load_report()
+    if not report:
+        return jsonify({"error": "No news run recorded yet"}), 404
+    return jsonify(report)
+
 @app.route('/api/last-updated-data', methods=['GET'])
 def last_updated_data():
     return jsonify({"last_updated_data": get_last_updated(LAST_UPDATED_DATA_FILE)})
@@ -354,16 +362,44 @@ def ath_data():
 
 @app.route("/api/ath/refresh", methods=["POST"])
 def refresh_ath_data():
-    try:
-        today = datetime.datetime.now().strftime('%Y-%m-%d')
-        output_file = run_ath_analysis(today)
+    today = datetime.datetime.now().strftime('%Y-%m-%d')
+    job, created = ath_jobs.submit(f"ath:{today}", f"ATH refresh {today}", refresh_ath_job, today)
+    return job_response(job, created, "ATH refresh")
+
+@app.route("/api/ath/backfill", methods=["POST"])
+def backfill_ath_data():
+    data = request.get_json(silent=True) or {}
+    start_date = data.get("start")
+    end_date = data.get("end")
+    dates = data.get("dates")
+    if not dates and not start_date:
+        return jsonify({"error": "Provide 'dates' or a 'start' date"}), 400
 
-        if output_file and os.path.exists(os.path.join("python", output_file)):
-            return jsonify({"message": f"✅ Refreshed successfully", "file": output_file}), 200
+    try:
+        if dates:
+            target_dates = sorted(pd.to_datetime(d) for d in dates)
         else:
-            return jsonify({"error": "ATH refresh failed"}), 500
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+            target_dates = list(pd.date_range(start_date, end_date or datetime.date.today(), freq='QS'))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid date: {e}"}), 400
+    if not target_dates:
+        return jsonify({"error": "No quarter starts in that range"}), 400
+
+    date_strs = [d.strftime('%Y-%m-%d') for d in target_dates]
+    job, created = ath_jobs.submit(
+        f"ath-backfill:{','.join(date_strs)}",
+        f"ATH backfill {date_strs[0]}..{date_strs[-1]}",
+        backfill_ath_job,
+        date_strs
+    )
+    return job_response(job, created, "ATH backfill")
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = ath_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
     
 @app.route('/ath-matrix')
 def ath_matrix():
@@ -558,8 +594,9 @@ def run_scheduled_jobs():
 def run_quarterly_ath_if_needed():
     today = datetime.datetime.today()
     if today.month in [1, 4, 7, 10] and today.day == 1:
-        print(f"[⏰] Running Quarterly ATH refresh for {today.strftime('%Y-%m-%d')}")
-        run_ath_analysis(today.strftime('%Y-%m-%d'))
+        target_date = today.strftime('%Y-%m-%d')
+        print(f"[⏰] Running Quarterly ATH refresh for {target_date}")
+        ath_jobs.submit(f"ath:{target_date}", f"ATH refresh {target_date}", refresh_ath_job, target_date)
 
 # === MAIN ===
 if __name__ == '__main__':
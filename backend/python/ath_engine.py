@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+ATH_RECORD_COLUMNS = [
+    "Company", "Peak Date", "Peak Price", "Status", "Category", "Sector", "Industry"
+]
+
+STATUS_BY_CATEGORY = {
+    0: "New ATH",
+    5: "Within 5% of ATH",
+    10: "Within 10% of ATH",
+}
+
+
+def build_close_matrix(price_frames):
+    """Align {symbol: OHLCV DataFrame} into a wide date x symbol matrix of closes."""
+    closes = {
+        symbol: df['Close'] for symbol, df in price_frames.items()
+        if df is not None and not df.empty
+    }
+    if not closes:
+        return pd.DataFrame(dtype='float64')
+    return pd.concat(closes, axis=1, sort=True)
+
+
+def _category_for(window_high, historical_ath):
+    """Vectorized 0/5/10 category; -1 means not within 10% of the ATH."""
+    with np.errstate(invalid='ignore'):
+        return np.select(
+            [
+                window_high > historical_ath,
+                window_high >= historical_ath * 0.95,
+                window_high >= historical_ath * 0.90,
+            ],
+            [0, 5, 10],
+            default=-1,
+        )
+
+
+def _window_bounds(dates, target_end):
+    """Row bounds (history_start, target_start, target_end) for a sorted date index."""
+    target_end = pd.to_datetime(target_end)
+    target_start = target_end - pd.DateOffset(months=1)
+    history_start = target_end - pd.DateOffset(years=5)
+    return (
+        int(dates.searchsorted(history_start, side='left')),
+        int(dates.searchsorted(target_start, side='left')),
+        int(dates.searchsorted(target_end, side='right')),
+    )
+
+
+def _range_max(block_max, bounds, lo, hi, width):
+    """NaN-ignoring column max over rows [lo, hi), stitched from block maxima."""
+    first = np.searchsorted(bounds, lo)
+    last = np.searchsorted(bounds, hi)
+    if lo >= hi or first >= last:
+        return np.full(width, np.nan)
+    return np.fmax.reduce(block_max[first:last], axis=0)
+
+
+def _build_records(columns, window, window_dates, historical_ath, sector_industry_map):
+    """Turn one target date's history maxima and window slice into ATH records."""
+    window_high = np.fmax.reduce(window, axis=0)
+    has_data = ~np.isnan(historical_ath) & ~np.isnan(window_high)
+
+    # Last row in the window that hit the high, matching the scalar
+    # detector's index[-1] tie-break.
+    is_high = window == window_high
+    peak_rows = window.shape[0] - 1 - is_high[::-1].argmax(axis=0)
+
+    categories = _category_for(window_high, historical_ath)
+    qualifying = has_data & (categories >= 0)
+
+    records = []
+    for col in np.flatnonzero(qualifying):
+        base_symbol = str(columns[col]).replace('.NS', '')
+        category = int(categories[col])
+
+        if base_symbol in sector_industry_map:
+            sector = sector_industry_map[base_symbol]['Sector']
+            industry = sector_industry_map[base_symbol]['Industry']
+        else:
+            sector = industry = "Unknown"
+
+        records.append({
+            "Company": base_symbol,
+            "Peak Date": window_dates[peak_rows[col]].date(),
+            "Peak Price": round(float(window_high[col]), 2),
+            "Status": STATUS_BY_CATEGORY[category],
+            "Category": category,
+            "Sector": sector,
+            "Industry": industry
+        })
+    return records
+
+
+def detect_ath_multi(closes, target_ends, sector_industry_map=None):
+    """
+    Score every symbol in a date x symbol close matrix against many target dates.
+
+    Each target's window bounds become block boundaries; one fmax.reduceat pass
+    over the matrix gives per-block maxima, and each target's five-year history
+    ATH is stitched from a handful of those blocks instead of rescanning rows.
+    Returns {target_end: records}.
+    """
+    sector_industry_map = sector_industry_map or {}
+    target_ends = [pd.to_datetime(t) for t in target_ends]
+    results = {t: [] for t in target_ends}
+    if closes.empty or not target_ends:
+        return results
+
+    if not closes.index.is_monotonic_increasing:
+        closes = closes.sort_index()
+    dates = closes.index
+    values = closes.to_numpy(dtype='float64')
+    n_rows, width = values.shape
+
+    window_bounds = {t: _window_bounds(dates, t) for t in target_ends}
+    bounds = np.unique([b for wb in window_bounds.values() for b in wb if b < n_rows])
+    if bounds.size == 0:
+        return results
+    block_max = np.fmax.reduceat(values, bounds, axis=0)
+
+    for target_end, (history_lo, window_lo, window_hi) in window_bounds.items():
+        if window_lo >= window_hi:
+            continue
+        historical_ath = _range_max(block_max, bounds, history_lo, window_lo, width)
+        results[target_end] = _build_records(
+            closes.columns,
+            values[window_lo:window_hi],
+            dates[window_lo:window_hi],
+            historical_ath,
+            sector_industry_map,
+        )
+    return results
+
@@ -1,29 +1,48 @@
-import subprocess
 import datetime
 import os
+import sys
+import pandas as pd
 
-def run_ath_analysis(target_date=None):
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import thread_athh
+
+def run_ath_analysis(target_date=None, progress=None):
     """
     Runs ATH + market cap pipeline for a given date (default: today)
-    Returns the formatted output filename (or None on failure)
+    in-process, handing the ATH DataFrame straight to the market cap step.
+    progress(stage, done, total) is forwarded to the pipeline.
+    Returns the formatted output filename; pipeline errors are raised
     """
-    try:
-        if not target_date:
-            target_date = datetime.date.today().strftime('%Y-%m-%d')
+    if not target_date:
+        target_date = datetime.date.today().strftime('%Y-%m-%d')
+
+    thread_athh.run_ath_pipeline([target_date], progress=progress)
 
-        # Step 1: Run ATH detection
-        subprocess.run(['python', 'thread_athh.py', target_date], cwd=os.path.dirname(__file__), check=True)
+    # Return output CSV filename
+    date_obj = datetime.datetime.strptime(target_date, '%Y-%m-%d')
+    formatted_date = date_obj.strftime('%d_%m_%Y')
+    output_filename = f"ATH_companies_with_market_cap_{formatted_date}.csv"
 
-        # Step 2: Run market cap scraper
-        subprocess.run(['python', 'scrapers.py', target_date], cwd=os.path.dirname(__file__), check=True)
+    return output_filename
 
-        # Return output CSV path
-        date_obj = datetime.datetime.strptime(target_date, '%Y-%m-%d')
-        formatted_date = date_obj.strftime('%d_%m_%Y')
-        output_filename = f"ATH_companies_with_market_cap_{formatted_date}.csv"
 
-        return output_filename
+def run_ath_backfill(start_date=None, end_date=None, target_dates=None, progress=None):
+    """
+    Runs the ATH + market cap pipeline for many dates in a single pass: either
+    an explicit list of target_dates or every quarter start between start_date
+    and end_date. History is downloaded once and every date is scored from it.
+    Returns the list of output filenames; pipeline errors are raised
+    """
+    if not target_dates:
+        target_dates = thread_athh.quarter_starts(start_date, end_date or datetime.date.today())
+    target_dates = sorted(pd.to_datetime(d) for d in target_dates)
+    if not target_dates:
+        return []
+
+    thread_athh.run_ath_pipeline(target_dates, progress=progress)
 
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error: {e}")
-        return None
+    return [
+        f"ATH_companies_with_market_cap_{d.strftime('%d_%m_%Y')}.csv"
+        for d in target_dates
+    ]
@@ -1,9 +1,14 @@
 import csv
 import os
+import sys
 from dateutil import parser
 from datetime import datetime, timedelta
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(SCRIPT_DIR)
+
+from scrapers import news_store
+
 CSV_FILE = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
 
 ALLOWED_CATEGORIES_PRIORITY = [
@@ -20,6 +25,10 @@ ALLOWED_CATEGORIES_PRIORITY = [
     'Other'
 ]
 
+# Sources that fill in missing times after scraping (fin_exp.backfill_times);
+# their rows without a time are left alone until that has happened
+BACKFILLED_TIME_SOURCES = {"Financial Express"}
+
 SPECIAL_WORD_MAPPING = {
     'money': 'Finance',
     'banking': 'Finance',
@@ -168,6 +177,32 @@ def clean_csv_in_place(csv_file):
 
     print(f"Cleaning complete. File '{csv_file}' updated in place.")
 
+def clean_news_store():
+    """
+    Clean the news store the same way clean_csv_in_place cleans a CSV, then
+    regenerate news_repository.csv from it once.
+    """
+    updated_rows = []
+    stale_links = []
+
+    for row in news_store.records():
+        if not row['Time'].strip() and row['Source'] in BACKFILLED_TIME_SOURCES:
+            continue
+        cleaned = dict(row)
+        cleaned['Time'] = clean_time_string(row['Time'])
+        cleaned['Category'] = clean_category_string(row['Category'])
+
+        if not is_recent_enough(cleaned['Time']):
+            print(f"[INFO] Removing old article dated {cleaned['Time']}")
+            stale_links.append(row['Link'])
+        elif cleaned != row:
+            updated_rows.append(cleaned)
+
+    news_store.apply_changes(updated_rows, stale_links)
+    news_store.export_csv()
+
+    print(f"Cleaning complete. {len(updated_rows)} rows updated, {len(stale_links)} removed, '{news_store.CSV_FILE}' regenerated.")
+
 
 if __name__ == "__main__":
-    clean_csv_in_place(CSV_FILE)
+    clean_news_store()
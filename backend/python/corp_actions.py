@@ -1,8 +1,12 @@
-import requests
 import pandas as pd
 import os
+import sys
 from datetime import datetime, timedelta
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scrapers import http_client
+
 # === PATH SETUP ===
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "../../frontend/static/assets/csv"))
@@ -37,7 +41,7 @@ def download_bse_csv(temp_file):
     }
 
     print("[DEBUG] Sending request to BSE...")
-    response = requests.get(url, headers=headers, params=params)
+    response = http_client.get(url, headers=headers, params=params, timeout=(5, 60))
     if response.ok:
         with open(temp_file, "wb") as f:
             f.write(response.content)
@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+
+# Finished jobs are kept this long so clients can still poll their result
+FINISHED_JOB_TTL = 6 * 60 * 60
+
+
+class Job:
+    def __init__(self, key, description):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.description = description
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stage = None
+        self.stage_started_at = None
+        self.done = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def update_progress(self, stage, done, total):
+        """Progress callback handed to the job target: (stage, done, total)"""
+        with self.lock:
+            if stage != self.stage:
+                self.stage = stage
+                self.stage_started_at = time.time()
+            self.done = done
+            self.total = total
+
+    @property
+    def is_active(self):
+        return self.status in ("queued", "running")
+
+    def to_dict(self):
+        with self.lock:
+            now = time.time()
+            elapsed = now - self.stage_started_at if self.stage_started_at else 0
+            rate = self.done / elapsed if elapsed > 0 else 0
+            eta = (self.total - self.done) / rate if rate > 0 and self.done < self.total else 0
+
+            def fmt(ts):
+                return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+
+            return {
+                "id": self.id,
+                "key": self.key,
+                "description": self.description,
+                "status": self.status,
+                "created_at": fmt(self.created_at),
+                "started_at": fmt(self.started_at),
+                "finished_at": fmt(self.finished_at),
+                "progress": {
+                    "stage": self.stage,
+                    "done": self.done,
+                    "total": self.total,
+                    "percent": round(self.done / self.total * 100, 1) if self.total else 0,
+                    "rate_per_min": round(rate * 60, 1),
+                    "eta_seconds": round(eta),
+                },
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """
+    Runs long pipelines one at a time on a background worker thread and
+    tracks them by id. Jobs wait as "queued" until the ones ahead of them
+    finish, since pipelines share their output files and caches. Submitting
+    a key that already has an active job returns that job instead of queueing
+    a second copy of the pipeline.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.active_by_key = {}
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.worker = None
+
+    def submit(self, key, description, target, *args, **kwargs):
+        """
+        Queue target(*args, progress=job.update_progress, **kwargs) to run in
+        the background. Returns (job, created).
+        """
+        with self.lock:
+            self._prune()
+            existing = self.active_by_key.get(key)
+            if existing and existing.is_active:
+                return existing, False
+
+            job = Job(key, description)
+            self.jobs[job.id] = job
+            self.active_by_key[key] = job
+            self.queue.put((job, target, args, kwargs))
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._work, daemon=True)
+                self.worker.start()
+        return job, True
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            self._run(*self.queue.get())
+
+    def _run(self, job, target, args, kwargs):
+        with job.lock:
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            result = target(*args, progress=job.update_progress, **kwargs)
+            with job.lock:
+                job.result = result
+                job.status = "succeeded"
+        except Exception as e:
+            print(f"[ERROR] Job {job.description} failed: {e}")
+            traceback.print_exc()
+            with job.lock:
+                job.error = str(e)
+                job.status = "failed"
+        finally:
+            with job.lock:
+                job.finished_at = time.time()
+            with self.lock:
+                if self.active_by_key.get(job.key) is job:
+                    del self.active_by_key[job.key]
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_TTL
+        stale = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at and job.finished_at < cutoff
+        ]
+        for job_id in stale:
+            del self.jobs[job_id]
@@ -0,0 +1,156 @@
+import atexit
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+
+# === PATH SETUP ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(SCRIPT_DIR, "market_cap_cache.json")
+RESOLUTION_INDEX_FILE = os.path.join(SCRIPT_DIR, "screener_index.json")
+
+# Entries older than this are still served, but refreshed in the background
+DEFAULT_TTL_HOURS = float(os.environ.get("MARKET_CAP_CACHE_TTL_HOURS", 24))
+
+# Tickers screener.in had no page for are retried after this long
+NEGATIVE_TTL_HOURS = float(os.environ.get("SCREENER_NEGATIVE_TTL_HOURS", 7 * 24))
+
+
+class _JsonStore:
+    """Dict of entries persisted to a JSON file with atomic writes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        # Saves come from the refresher thread and the pipeline at once
+        self.save_lock = threading.Lock()
+        self.entries = self._load()
+        self.dirty = False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable cache file {self.path}: {e}")
+            return {}
+
+    def save(self):
+        """Atomically write the store to disk"""
+        with self.save_lock:
+            with self.lock:
+                snapshot = dict(self.entries)
+                self.dirty = False
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+    def save_if_dirty(self):
+        if self.dirty:
+            self.save()
+
+
+class MarketCapCache(_JsonStore):
+    """
+    On-disk market cap cache keyed by the cleaned screener.in symbol.
+
+    Fresh entries are returned as-is. Stale entries are returned too, and a
+    single background worker re-fetches them (stale-while-revalidate), so a
+    re-run never waits on screener.in for a company it has seen before.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl_hours=DEFAULT_TTL_HOURS):
+        super().__init__(path)
+        self.ttl = ttl_hours * 60 * 60
+        self.refreshing = set()
+        self.refresh_queue = queue.Queue()
+        self.refresher = None
+        # Refreshes still queued at exit are dropped; finished ones are kept
+        atexit.register(self.save_if_dirty)
+
+    def get(self, key):
+        """Return (market_cap, is_fresh); market_cap is None on a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if not entry:
+            return None, False
+        return entry["value"], time.time() - entry["fetched_at"] < self.ttl
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = {"value": value, "fetched_at": time.time()}
+            self.dirty = True
+
+    def refresh_async(self, key, fetch):
+        """Re-fetch a stale entry in the background; duplicate requests are dropped"""
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+            if self.refresher is None:
+                # Daemon, so a queue of stale entries never holds up interpreter exit
+                self.refresher = threading.Thread(target=self._refresh_loop, name="market-cap-refresh", daemon=True)
+                self.refresher.start()
+        self.refresh_queue.put((key, fetch))
+
+    def _refresh_loop(self):
+        while True:
+            key, fetch = self.refresh_queue.get()
+            self._refresh(key, fetch)
+            # One write per batch of refreshes rather than per key
+            if self.refresh_queue.empty():
+                self.save_if_dirty()
+
+    def _refresh(self, key, fetch):
+        try:
+            value = fetch()
+            if value:
+                self.set(key, value)
+        except Exception as e:
+            print(f"⚠️ Background market cap refresh failed for {key}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+
+class ScreenerResolutionIndex(_JsonStore):
+    """
+    Remembers which screener.in URL (consolidated, standalone or an alternate
+    symbol spelling) worked for each ticker, and which tickers have no page,
+    so later lookups cost at most one request.
+    """
+
+    def __init__(self, path=RESOLUTION_INDEX_FILE, negative_ttl_hours=NEGATIVE_TTL_HOURS):
+        super().__init__(path)
+        self.negative_ttl = negative_ttl_hours * 60 * 60
+
+    def get(self, ticker):
+        """Return (resolved_url, known_missing)"""
+        with self.lock:
+            entry = self.entries.get(ticker)
+        if not entry:
+            return None, False
+        if entry["url"]:
+            return entry["url"], False
+        return None, time.time() - entry["checked_at"] < self.negative_ttl
+
+    def resolve(self, ticker, url):
+        with self.lock:
+            self.entries[ticker] = {"url": url, "checked_at": time.time()}
+
+    def mark_missing(self, ticker):
+        with self.lock:
+            self.entries[ticker] = {"url": None, "checked_at": time.time()}
+
+    def forget(self, ticker):
+        with self.lock:
+            self.entries.pop(ticker, None)
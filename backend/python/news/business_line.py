@@ -1,18 +1,16 @@
 import os
+import sys
 import time
-import csv
-from datetime import datetime, timedelta, timezone
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from datetime import datetime, timezone
 from bs4 import BeautifulSoup
-import pandas as pd
-from filelock import FileLock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import news_browser, news_store
+from scrapers.news_source import NewsSource
 
 # ----------------------------------------------------------------------------
 # Constants
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-NEWS_REPO = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
-LOCK_FILE = NEWS_REPO + ".lock"
 SOURCE = "Hindu Business Line"
 ALLOWED_CATEGORIES = {
     "Commodities",
@@ -24,10 +22,6 @@ ALLOWED_CATEGORIES = {
 }
 
 URL = "https://www.thehindubusinessline.com/latest-news/"
-NOW_UTC = datetime.now(timezone.utc)
-TIME_CUTOFF = NOW_UTC - timedelta(hours=24)
-
-COLUMNS = ["Source", "Headline", "Link", "Category", "Time"]
 
 # ----------------------------------------------------------------------------
 def safe_print(*args, **kwargs):
@@ -39,38 +33,12 @@ def safe_print(*args, **kwargs):
         print(text.encode('ascii', errors='replace').decode('ascii'), **kwargs)
 
 # ----------------------------------------------------------------------------
-def load_existing_links():
-    if not os.path.exists(NEWS_REPO):
-        return set()
-    try:
-        df = pd.read_csv(NEWS_REPO)
-        return set(df['Link'].dropna().values)
-    except Exception as e:
-        safe_print("[WARN] Error reading existing repository:", e)
-        return set()
-
-# ----------------------------------------------------------------------------
-def main():
-    safe_print("[START] HBL Scraper")
-    existing_links = load_existing_links()
-
-    # Setup headless Chrome
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--log-level=3")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.get(URL)
-    time.sleep(5)  # Wait for page to load
-
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
-    driver.quit()
-
+def parse_news_items(html, cutoff):
+    soup = BeautifulSoup(html, 'html.parser')
     news_div = soup.find('div', class_='fgdf')
     if not news_div:
         safe_print("[ERROR] No news container found.")
-        return
+        return [], True
 
     news_items = news_div.find_all('li')
     new_entries = []
@@ -93,12 +61,12 @@ def main():
             safe_print("[WARN] Unable to parse time:", time_str)
             continue
 
-        if article_dt < TIME_CUTOFF:
+        if article_dt < cutoff:
             safe_print("[STOP] Encountered article older than 24 hours:", time_str)
             break
 
         # Stop if duplicate
-        if link in existing_links:
+        if news_store.has_link(link):
             safe_print("[STOP] Duplicate article found:", link)
             break
 
@@ -117,26 +85,28 @@ def main():
             "Time": time_str
         })
 
-    if not new_entries:
-        safe_print("[INFO] No new articles found.")
-        return
+    return new_entries, True
 
-    # ----------------------------------------------------------------------------
-    # Save to news_repository.csv with locking
-    with FileLock(LOCK_FILE):
-        safe_print("[LOCK] Acquired lock for writing")
-        if os.path.exists(NEWS_REPO):
-            existing_df = pd.read_csv(NEWS_REPO)
-            combined_df = pd.concat([pd.DataFrame(new_entries, columns=COLUMNS), existing_df], ignore_index=True)
-            combined_df.drop_duplicates(subset=["Link"], inplace=True, keep='first')
-        else:
-            combined_df = pd.DataFrame(new_entries, columns=COLUMNS)
+# ----------------------------------------------------------------------------
+class BusinessLineSource(NewsSource):
+    name = SOURCE
+    utc = True
 
-        combined_df.to_csv(NEWS_REPO, index=False)
-        safe_print("[SAVE]", len(new_entries), "new articles added to", NEWS_REPO)
+    def fetch_candidates(self):
+        safe_print("[START] HBL Scraper")
+        with news_browser.browser() as driver:
+            news_browser.load(driver, URL)
+            time.sleep(5)  # Wait for page to load
+            html = driver.page_source
+        yield html
 
-    safe_print("[DONE] HBL scraping complete.")
+    def parse(self, html):
+        return parse_news_items(html, self.cutoff)
+
+source = BusinessLineSource()
 
 # ----------------------------------------------------------------------------
 if __name__ == "__main__":
-    main()
+    added = source.run()
+    safe_print("[SAVE]", added, "new articles added to the news store")
+    safe_print("[DONE] HBL scraping complete.")
@@ -1,23 +1,19 @@
 import os
-import csv
+import sys
 import time
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-import pandas as pd
-from filelock import FileLock
-from pyvirtualdisplay import Display
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import news_browser, news_store
+from scrapers.news_source import NewsSource
 
 # Constants
+SOURCE = "Business Standard"
 BASE_URL = "https://www.business-standard.com/latest-news"
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-REPO_FILE = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
-LOCK_FILE = REPO_FILE + ".lock"
 
 ALLOWED_CATEGORIES = {"companies", "economy", "markets", "industry", "finance"}
-COLUMNS = ["Source", "Headline", "Link", "Category", "Time"]
 
 MAX_AGE_HOURS = 24
 
@@ -40,16 +36,7 @@ def parse_bs_timestamp(time_text):
     except Exception:
         return None, False
 
-def load_existing_links():
-    if not os.path.exists(REPO_FILE):
-        return set()
-    try:
-        df = pd.read_csv(REPO_FILE)
-        return set(df['Link'].dropna().values)
-    except Exception:
-        return set()
-
-def extract_articles_from_soup(soup, existing_links, cutoff_datetime):
+def extract_articles_from_soup(soup, cutoff_datetime):
     container = soup.find('div', class_='article-listing')
     if not container:
         return [], True
@@ -66,7 +53,7 @@ def extract_articles_from_soup(soup, existing_links, cutoff_datetime):
         link = headline_tag['href'].strip()
         headline = headline_tag.text.strip()
 
-        if link in existing_links:
+        if news_store.has_link(link):
             stop = True
             break
 
@@ -92,7 +79,7 @@ def extract_articles_from_soup(soup, existing_links, cutoff_datetime):
             continue
 
         new_entries.append({
-            "Source": "Business Standard",
+            "Source": SOURCE,
             "Headline": headline,
             "Link": link,
             "Category": category,
@@ -101,56 +88,27 @@ def extract_articles_from_soup(soup, existing_links, cutoff_datetime):
 
     return new_entries, stop
 
-def main():
-    cutoff_datetime = datetime.now() - timedelta(hours=MAX_AGE_HOURS)
-    existing_links = load_existing_links()
-
-    # 🖥️ Start virtual display for non-headless Chromium
-    with Display(visible=0, size=(1920, 1080)):
-        chrome_options = Options()
-        chrome_options.binary_location = "/usr/bin/chromium"
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
-
-        service = Service(executable_path="/usr/bin/chromedriver")
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-
-        all_new_entries = []
-        page_number = 1
-        stop_scraping = False
-
-        while not stop_scraping:
-            page_url = BASE_URL if page_number == 1 else f"{BASE_URL}/page-{page_number}"
-            driver.get(page_url)
-            time.sleep(5)
-
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            new_entries, stop_scraping = extract_articles_from_soup(soup, existing_links, cutoff_datetime)
-
-            all_new_entries.extend(new_entries)
-            if stop_scraping:
-                break
-            page_number += 1
-
-        driver.quit()
-
-    if not all_new_entries:
-        print("No new articles added from Business Standard.")
-        return
+class BusinessStandardSource(NewsSource):
+    name = SOURCE
+    max_age = timedelta(hours=MAX_AGE_HOURS)
 
-    with FileLock(LOCK_FILE):
-        if os.path.exists(REPO_FILE):
-            existing_df = pd.read_csv(REPO_FILE)
-            combined_df = pd.concat([pd.DataFrame(all_new_entries, columns=COLUMNS), existing_df], ignore_index=True)
-            combined_df.drop_duplicates(subset=["Link"], inplace=True, keep='first')
-        else:
-            combined_df = pd.DataFrame(all_new_entries, columns=COLUMNS)
+    def fetch_candidates(self):
+        # 🖥️ Non-headless Chromium on the virtual display
+        with news_browser.browser("display") as driver:
+            page_number = 1
+            while True:
+                page_url = BASE_URL if page_number == 1 else f"{BASE_URL}/page-{page_number}"
+                news_browser.load(driver, page_url)
+                time.sleep(5)
+                yield driver.page_source
+                page_number += 1
 
-        combined_df.to_csv(REPO_FILE, index=False)
+    def parse(self, page_source):
+        soup = BeautifulSoup(page_source, 'html.parser')
+        return extract_articles_from_soup(soup, self.cutoff)
 
-    print(f"{len(all_new_entries)} articles added from Business Standard.")
+source = BusinessStandardSource()
 
 if __name__ == "__main__":
-    main()
+    added = source.run()
+    print(f"{added} articles added from Business Standard.")
@@ -1,126 +1,102 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
 import time
-import pandas as pd
 from datetime import datetime
 import os
-from filelock import FileLock
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import news_browser, news_store
+from scrapers.news_source import NewsSource
 
 URL = "https://www.cnbctv18.com/latest-news/"
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CSV_FILE = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
-LOCK_FILE = CSV_FILE + ".lock"
 SOURCE_NAME = "CNBC TV 18"
 
-COLUMNS = ["Source", "Headline", "Link", "Category", "Time"]
 ALLOWED_CATEGORIES = {"market", "stock", "business", "economy"}
 
-options = Options()
-options.add_argument("--headless")
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-driver = webdriver.Chrome(options=options)
-
-def load_existing_links():
-    with FileLock(LOCK_FILE):
-        if os.path.exists(CSV_FILE):
-            df = pd.read_csv(CSV_FILE)
-            if not all(col in df.columns for col in COLUMNS):
-                df = pd.DataFrame(columns=COLUMNS)
-                df.to_csv(CSV_FILE, index=False)
-            return set(df["Link"].dropna().tolist())
-        else:
-            return set()
-
-existing_links = load_existing_links()
-
-def is_today(date_str):
+MAX_SCROLLS = 50
+
+# Returns the story items after index arguments[0], so each scroll only
+# transfers and parses the stories it loaded.
+NEW_ITEMS_JS = """
+return Array.from(document.querySelectorAll("article.story-item")).slice(arguments[0]).map(article => {
+    const cat = article.querySelector("span.story-cat");
+    const title = article.querySelector("h2.story-title");
+    const link = title ? title.closest("a") : null;
+    const time = article.querySelector("time");
+    return {
+        category: cat ? cat.textContent.trim().toLowerCase() : "",
+        title: title ? title.textContent.trim() : "",
+        href: link ? (link.getAttribute("href") || "") : "",
+        time: time ? time.textContent.trim() : ""
+    };
+});
+"""
+
+def parse_published(date_str):
     try:
-        article_date = datetime.strptime(date_str.strip(), "%b %d, %Y %I:%M %p")
-        return article_date.date() == datetime.now().date()
+        return datetime.strptime(date_str.strip(), "%b %d, %Y %I:%M %p")
     except Exception:
-        return False
+        return None
 
-def extract_articles(soup, existing_links):
-    articles = soup.find_all("article", class_="story-item")
+def extract_articles(items, cutoff):
     extracted = []
-    stop_flag = False
-
-    for article in articles:
-        try:
-            category_tag = article.find("span", class_="story-cat")
-            category = category_tag.text.strip().lower() if category_tag else ""
-            if category not in ALLOWED_CATEGORIES:
-                continue
-
-            title_tag = article.find("h2", class_="story-title")
-            title = title_tag.text.strip() if title_tag else ""
-            link_tag = title_tag.find_parent("a") if title_tag else None
-            link = link_tag["href"] if link_tag and link_tag.has_attr("href") else ""
-
-            time_tag = article.find("time")
-            published_time = time_tag.text.strip() if time_tag else ""
-
-            if not is_today(published_time):
-                stop_flag = True
-                break
-            if link in existing_links:
-                stop_flag = True
-                break
-
-            extracted.append({
-                "Source": SOURCE_NAME,
-                "Headline": title,
-                "Link": link,
-                "Category": category,
-                "Time": published_time
-            })
-        except Exception:
+
+    for item in items:
+        category = item.get("category", "")
+        if category not in ALLOWED_CATEGORIES:
             continue
 
-    return extracted, stop_flag
-
-def scroll_and_scrape():
-    driver.get(URL)
-    time.sleep(3)
-
-    all_articles = []
-    stop = False
-    last_height = driver.execute_script("return document.body.scrollHeight")
-    max_scrolls = 50
-
-    for _ in range(max_scrolls):
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        new_articles, stop = extract_articles(soup, existing_links)
-        all_articles.extend(new_articles)
-        if stop:
-            break
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            break
-        last_height = new_height
-
-    driver.quit()
-
-    if all_articles:
-        new_df = pd.DataFrame(all_articles, columns=COLUMNS)
-        with FileLock(LOCK_FILE):
-            if os.path.exists(CSV_FILE):
-                current_df = pd.read_csv(CSV_FILE)
-                if not all(col in current_df.columns for col in COLUMNS):
-                    current_df = pd.DataFrame(columns=COLUMNS)
-                combined_df = pd.concat([new_df, current_df], ignore_index=True)
-            else:
-                combined_df = new_df
-
-            combined_df.to_csv(CSV_FILE, index=False)
-
-        print(f"{len(all_articles)} articles added from CNBCTV18.")
-    else:
-        print("0 articles added from CNBCTV18.")
+        link = item.get("href", "")
+        published_time = item.get("time", "")
+
+        published = parse_published(published_time)
+        if not published or published < cutoff:
+            return extracted, True
+        if news_store.has_link(link):
+            return extracted, True
+
+        extracted.append({
+            "Source": SOURCE_NAME,
+            "Headline": item.get("title", ""),
+            "Link": link,
+            "Category": category,
+            "Time": published_time
+        })
+
+    return extracted, False
+
+class CNBCTV18Source(NewsSource):
+    name = SOURCE_NAME
+
+    @property
+    def cutoff(self):
+        """Only today's articles are collected"""
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def fetch_candidates(self):
+        with news_browser.browser() as driver:
+            news_browser.load(driver, URL)
+            time.sleep(3)
+
+            cursor = 0
+            last_height = driver.execute_script("return document.body.scrollHeight")
+            for _ in range(MAX_SCROLLS):
+                items = driver.execute_script(NEW_ITEMS_JS, cursor) or []
+                cursor += len(items)
+                yield items
+
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(2)
+                new_height = driver.execute_script("return document.body.scrollHeight")
+                if new_height == last_height:
+                    return
+                last_height = new_height
+
+    def parse(self, items):
+        return extract_articles(items, self.cutoff)
+
+source = CNBCTV18Source()
 
 if __name__ == "__main__":
-    scroll_and_scrape()
+    added = source.run()
+    print(f"{added} articles added from CNBCTV18.")
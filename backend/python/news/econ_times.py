@@ -1,42 +1,24 @@
-import csv
 import os
+import sys
 import time
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from urllib.parse import urlparse
-import msvcrt
 
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import news_browser, news_store
+from scrapers.news_source import NewsSource
 
 # === Settings ===
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CSV_FILE = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
 SOURCE = "Economic Times"
-TIME_LIMIT = datetime.now(timezone.utc) - timedelta(hours=24)
-HEADERS = ["Source", "Headline", "Link", "Category", "Time"]
 
 START_URL = "https://economictimes.indiatimes.com/news/latest-news"
 
 ALLOWED_CATEGORIES = {"markets", "stocks", "ipos", "economy", "finance"}
 
-# === Windows File Locking ===
-_locked_sizes = {}
-
-def lock_file(file):
-    file.seek(0, os.SEEK_END)
-    size = file.tell()
-    if size == 0:
-        size = 4096
-    file.seek(0)
-    msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, size)
-    _locked_sizes[file.fileno()] = size
-
-def unlock_file(file):
-    size = _locked_sizes.get(file.fileno(), 4096)
-    file.seek(0)
-    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, size)
-    _locked_sizes.pop(file.fileno(), None)
+SCROLL_AMOUNT = 300
+SCROLL_WAIT = 1.0
+MAX_SCROLLS = 100
 
 # === Category Parsing ===
 def parse_category_from_link(link):
@@ -72,60 +54,33 @@ def parse_category_from_link(link):
 def is_allowed_category(category):
     return category in ALLOWED_CATEGORIES
 
-# === CSV Handling ===
-def read_existing_links():
-    links = set()
-    if not os.path.exists(CSV_FILE):
-        return links
-    with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
-        lock_file(f)
-        reader = csv.DictReader(f)
-        for row in reader:
-            links.add(row["Link"])
-        unlock_file(f)
-    return links
-
-def append_new_articles(new_records):
-    existing_records = []
-    if os.path.exists(CSV_FILE):
-        with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
-            lock_file(f)
-            reader = csv.DictReader(f)
-            existing_records = list(reader)
-            unlock_file(f)
-
-    with open(CSV_FILE, 'w+', newline='', encoding='utf-8') as f:
-        lock_file(f)
-        writer = csv.DictWriter(f, fieldnames=HEADERS)
-        writer.writeheader()
-        writer.writerows(new_records)         # new on top
-        writer.writerows(existing_records)    # old below
-        f.flush()
-        unlock_file(f)
-
-# === HTML Parsing ===
-def extract_articles_from_html(html):
-    soup = BeautifulSoup(html, "html.parser")
-    ul_data = soup.find("ul", class_="data")
-    if not ul_data:
-        return []
-    return ul_data.find_all("li", recursive=False)
-
-def parse_article_li(li_tag):
+# === DOM Extraction ===
+# Returns the listing items after index arguments[0], so each scroll only
+# transfers and parses the items it loaded.
+NEW_ITEMS_JS = """
+const list = document.querySelector("ul.data");
+if (!list) return [];
+return Array.from(list.querySelectorAll(":scope > li")).slice(arguments[0]).map(li => {
+    const a = li.querySelector("a[href]");
+    const ts = li.querySelector("span.timestamp");
+    return {
+        href: a ? a.getAttribute("href") : null,
+        headline: a ? a.textContent.trim() : "",
+        time: ts ? (ts.getAttribute("data-time") || "") : ""
+    };
+});
+"""
+
+def parse_article_item(item):
     try:
-        a_tag = li_tag.find("a", href=True)
-        if not a_tag:
+        link = item.get("href")
+        if not link:
             return None, None
-
-        headline = a_tag.get_text(strip=True)
-        link = a_tag["href"]
         if not link.startswith("http"):
             link = "https://economictimes.indiatimes.com" + link
 
         category = parse_category_from_link(link)
-
-        time_tag = li_tag.find("span", class_="timestamp")
-        timestr = time_tag["data-time"] if time_tag and time_tag.has_attr("data-time") else ""
+        timestr = item.get("time") or ""
 
         art_datetime = None
         if timestr:
@@ -137,7 +92,7 @@ def parse_article_li(li_tag):
 
         return {
             "Source": SOURCE,
-            "Headline": headline,
+            "Headline": item.get("headline", ""),
             "Link": link,
             "Category": category,
             "Time": timestr
@@ -145,69 +100,52 @@ def parse_article_li(li_tag):
     except Exception:
         return None, None
 
-# === Main Scraping ===
-def main():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.get(START_URL)
-    time.sleep(3)
-
-    existing_links = read_existing_links()
-
-    all_new_records = []
-    stop_scraping = False
-    seen_links = set()
-
-    SCROLL_AMOUNT = 300
-    SCROLL_WAIT = 1.0
-    MAX_SCROLLS = 100
-
-    scroll_count = 0
-    last_height = driver.execute_script("return document.body.scrollHeight")
-
-    while not stop_scraping and scroll_count < MAX_SCROLLS:
-        driver.execute_script(f"window.scrollBy(0, {SCROLL_AMOUNT});")
-        time.sleep(SCROLL_WAIT)
-
-        page_source = driver.page_source
-        articles = extract_articles_from_html(page_source)
-
-        for li in articles:
-            record, art_time = parse_article_li(li)
+# === Source ===
+class EconomicTimesSource(NewsSource):
+    name = SOURCE
+    utc = True
+
+    def fetch_candidates(self):
+        with news_browser.browser() as driver:
+            news_browser.load(driver, START_URL)
+            time.sleep(3)
+
+            cursor = 0
+            last_height = driver.execute_script("return document.body.scrollHeight")
+            for _ in range(MAX_SCROLLS):
+                driver.execute_script(f"window.scrollBy(0, {SCROLL_AMOUNT});")
+                time.sleep(SCROLL_WAIT)
+
+                items = driver.execute_script(NEW_ITEMS_JS, cursor) or []
+                cursor += len(items)
+                yield items
+
+                new_height = driver.execute_script("return document.body.scrollHeight")
+                if new_height == last_height:
+                    return
+                last_height = new_height
+
+    def parse(self, items):
+        records = []
+        for item in items:
+            record, art_time = parse_article_item(item)
             if not record:
                 continue
 
-            if record["Link"] in existing_links or record["Link"] in seen_links:
-                stop_scraping = True
-                break
+            if news_store.has_link(record["Link"]):
+                return records, True
 
-            if art_time and art_time < TIME_LIMIT:
-                stop_scraping = True
-                break
+            if art_time and art_time < self.cutoff:
+                return records, True
 
             if not is_allowed_category(record["Category"]):
                 continue
 
-            all_new_records.append(record)
-            seen_links.add(record["Link"])
-
-        if stop_scraping:
-            break
-
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            break
-        last_height = new_height
-        scroll_count += 1
-
-    driver.quit()
+            records.append(record)
+        return records, False
 
-    if all_new_records:
-        append_new_articles(all_new_records)
+source = EconomicTimesSource()
 
 if __name__ == "__main__":
-    main()
+    added = source.run()
+    print(f"{added} articles added from Economic Times.")
@@ -1,25 +1,44 @@
-import requests
 from bs4 import BeautifulSoup
-import csv
+import json
 import time
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 import os
-from filelock import FileLock
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import fetch_cache, http_client, news_store
+from scrapers.news_source import NewsSource
+import cleaner
 
 # ----------------------------------------------------------------------------
 # Constants
 # ----------------------------------------------------------------------------
 BASE_URL = "https://www.financialexpress.com/latest-news/"
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CSV_FILE = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
-LOCK_FILE = CSV_FILE + ".lock"
 SOURCE = "Financial Express"
-TIME_LIMIT = datetime.now(timezone.utc) - timedelta(hours=24)
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 }
 
+# Listing markup hashed to tell whether the page changed since the last run
+LISTING_SECTION = ("wp-block-newspack-blocks-ie-stories", "page-numbers")
+
+# Article pages fetched at once to fill in missing times, and seconds the
+# whole backfill may take; articles not reached are retried next run
+TIME_FETCH_WORKERS = 4
+TIME_BACKFILL_BUDGET = 60
+
+# Publish times read from article pages ("" when the page had none), so no
+# article page is fetched twice. Entries are dropped after TIME_CACHE_MAX_AGE.
+# Pages that couldn't be read are retried after TIME_RETRY_SECONDS, and their
+# articles dropped after MAX_TIME_FAILURES attempts.
+TIME_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fin_exp_times.json")
+TIME_CACHE_MAX_AGE = 3 * 24 * 3600
+TIME_RETRY_SECONDS = 15 * 60
+MAX_TIME_FAILURES = 3
+
 VALID_CATEGORIES = {
     "banking-finance",
     "business",
@@ -29,8 +48,6 @@ VALID_CATEGORIES = {
     "market"
 }
 
-FIELDNAMES = ["Source", "Headline", "Link", "Category", "Time"]
-
 # ----------------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------------
@@ -88,155 +105,190 @@ def parse_article_div2(article):
     }, art_datetime
 
 def get_soup(url):
-    resp = requests.get(url, headers=HEADERS, timeout=10)
+    resp = http_client.get(url, headers=HEADERS, timeout=10)
     resp.raise_for_status()
     return BeautifulSoup(resp.content, "html.parser")
 
-# ----------------------------------------------------------------------------
-# CSV Operations
-# ----------------------------------------------------------------------------
-def load_existing_links():
-    links = set()
-    if not os.path.exists(CSV_FILE):
-        return links
-    with FileLock(LOCK_FILE):
-        with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                links.add(row["Link"])
-    return links
-
-def write_new_records_on_top(new_records):
-    existing_records = []
-    if os.path.exists(CSV_FILE):
-        with FileLock(LOCK_FILE):
-            with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                existing_records = list(reader)
-
-    with FileLock(LOCK_FILE):
-        with open(CSV_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-            writer.writeheader()
-            writer.writerows(new_records)
-            writer.writerows(existing_records)
+def fetch_listing(url):
+    page = fetch_cache.fetch(url, section=LISTING_SECTION, headers=HEADERS, timeout=10)
+    page.response.raise_for_status()
+    return page
 
 # ----------------------------------------------------------------------------
 # Main Scrape
 # ----------------------------------------------------------------------------
-def scrape():
-    page = 1
-    stop_scraping = False
-    all_new_records = []
-
-    existing_links = load_existing_links()
-
-    while not stop_scraping:
-        url = BASE_URL if page == 1 else f"{BASE_URL}page/{page}/"
-        try:
-            soup = get_soup(url)
-        except Exception:
-            break
-
+class FinancialExpressSource(NewsSource):
+    name = SOURCE
+    utc = True
+
+    def fetch_candidates(self):
+        self.fetched_pages = []
+        page = 1
+        while True:
+            url = BASE_URL if page == 1 else f"{BASE_URL}page/{page}/"
+            try:
+                listing = fetch_listing(url)
+            except Exception:
+                return
+            self.fetched_pages.append(listing)
+            yield listing
+            page += 1
+            time.sleep(1)
+
+    def parse(self, listing):
+        records = []
+        if not listing.changed:
+            # Same stories as the last stored run, nothing new below them
+            return records, True
+
+        soup = BeautifulSoup(listing.content, "html.parser")
         story_divs = soup.find_all("div", class_="wp-block-newspack-blocks-ie-stories")
         if len(story_divs) < 2:
-            break
+            return records, True
 
         # div 1
-        first_div = story_divs[0]
-        first_article = first_div.find("article")
+        first_article = story_divs[0].find("article")
         if first_article:
             record = parse_article_div1(first_article)
             if record:
-                if record["Link"] in existing_links:
-                    stop_scraping = True
-                    break
-                all_new_records.append(record)
+                if news_store.has_link(record["Link"]):
+                    return records, True
+                records.append(record)
 
         # div 2
-        second_div = story_divs[1]
-        articles = second_div.find_all("article")
-        for art in articles:
+        for art in story_divs[1].find_all("article"):
             record, art_time = parse_article_div2(art)
             if not record:
                 continue
-            if record["Link"] in existing_links:
-                stop_scraping = True
-                break
+            if news_store.has_link(record["Link"]):
+                return records, True
 
-            all_new_records.append(record)
+            records.append(record)
 
-            if art_time and art_time < TIME_LIMIT:
-                stop_scraping = True
-                break
+            if art_time and art_time < self.cutoff:
+                return records, True
 
-        if stop_scraping:
-            break
+        return records, False
 
-        page += 1
-        time.sleep(1)
+    def finalize(self):
+        fetch_cache.remember(self.fetched_pages)
+        backfill_times(self.cutoff)
 
-    if all_new_records:
-        write_new_records_on_top(all_new_records)
-        print(f"... {len(all_new_records)} articles added from FinancialExpress ...")
-    else:
-        print("... No new FinancialExpress articles found ...")
+source = FinancialExpressSource()
 
 # ----------------------------------------------------------------------------
 # Fix Times
 # ----------------------------------------------------------------------------
 def fetch_time_from_article_page(link):
+    """
+    Publish time string of an article, "" when the page has none, or None
+    when the page couldn't be fetched
+    """
     try:
         soup = get_soup(link)
-        written_box = soup.find("div", class_="written_box")
-        if written_box:
-            time_tag = written_box.find("time")
-            if time_tag and time_tag.has_attr("datetime"):
-                timestr = time_tag["datetime"]
-                art_datetime = datetime.fromisoformat(timestr).astimezone(timezone.utc)
-                return timestr, art_datetime
     except Exception:
-        pass
-    return "", None
+        return None
+    written_box = soup.find("div", class_="written_box")
+    if written_box:
+        time_tag = written_box.find("time")
+        if time_tag and time_tag.has_attr("datetime"):
+            timestr = time_tag["datetime"]
+            try:
+                datetime.fromisoformat(timestr)
+                return timestr
+            except ValueError:
+                pass
+    return ""
+
+def load_time_cache():
+    if not os.path.exists(TIME_CACHE_FILE):
+        return {}
+    try:
+        with open(TIME_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_time_cache(cache):
+    now = time.time()
+    cache = {link: entry for link, entry in cache.items() if now - entry["fetched"] <= TIME_CACHE_MAX_AGE}
+    tmp_path = TIME_CACHE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, TIME_CACHE_FILE)
+
+def fetch_missing_times(links):
+    """
+    Fetch publish times for `links` TIME_FETCH_WORKERS at a time. Returns
+    {link: timestr or None} for the pages tried within TIME_BACKFILL_BUDGET.
+    """
+    executor = ThreadPoolExecutor(max_workers=TIME_FETCH_WORKERS)
+    futures = {executor.submit(fetch_time_from_article_page, link): link for link in links}
+    done, not_done = wait(futures, timeout=TIME_BACKFILL_BUDGET)
+    executor.shutdown(wait=False, cancel_futures=True)
+    if not_done:
+        print(f"... {len(not_done)} article times left for the next run ...")
+    return {futures[future]: future.result() for future in done}
+
+def needs_fetch(entry, now):
+    if entry is None:
+        return True
+    return entry["time"] is None and entry["failures"] < MAX_TIME_FAILURES and now - entry["fetched"] >= TIME_RETRY_SECONDS
+
+def is_cleaned(category):
+    """True once cleaner.clean_news_store has mapped the category slugs to its own names"""
+    return all(c in cleaner.ALLOWED_CATEGORIES_PRIORITY for c in category.split(", "))
+
+def backfill_times(time_limit):
+    """
+    For rows not yet normalized by the cleaner: keep valid categories, fill in
+    missing times from article pages and drop articles older than
+    `time_limit`, written to the news store in one batch.
+    """
+    rows = [row for row in news_store.records(source=SOURCE) if not is_cleaned(row["Category"])]
+    cache = load_time_cache()
+    now = time.time()
+
+    missing = [
+        row["Link"] for row in rows
+        if row["Time"].strip() == "" and needs_fetch(cache.get(row["Link"]), now) and filter_categories(row["Category"])
+    ]
+    if missing:
+        for link, timestr in fetch_missing_times(missing).items():
+            failures = 0 if timestr is not None else cache.get(link, {}).get("failures", 0) + 1
+            cache[link] = {"time": timestr, "fetched": now, "failures": failures}
+        save_time_cache(cache)
 
-def fix_csv_times():
     updated_records = []
-    with FileLock(LOCK_FILE):
-        with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            records = list(reader)
-
-    for row in records:
-        if row["Source"] != SOURCE:
-            updated_records.append(row)
-            continue
+    dropped_links = []
 
+    for row in rows:
         filtered = filter_categories(row["Category"])
         if not filtered:
+            dropped_links.append(row["Link"])
             continue
-        row["Category"] = filtered
-
-        if row["Time"].strip() == "":
-            link = row["Link"]
-            timestr, art_datetime = fetch_time_from_article_page(link)
-            if art_datetime and art_datetime >= TIME_LIMIT:
-                row["Time"] = timestr
-                updated_records.append(row)
-        else:
-            try:
-                art_datetime = datetime.fromisoformat(row["Time"]).astimezone(timezone.utc)
-                if art_datetime >= TIME_LIMIT:
-                    updated_records.append(row)
-            except Exception:
+
+        timestr = row["Time"].strip()
+        if timestr == "":
+            entry = cache.get(row["Link"])
+            if entry is None or (entry["time"] is None and entry["failures"] < MAX_TIME_FAILURES):
+                # Not reached within the budget, or the page failed; retried later
                 continue
+            timestr = entry["time"] or ""
+
+        try:
+            art_datetime = datetime.fromisoformat(timestr).astimezone(timezone.utc)
+        except ValueError:
+            dropped_links.append(row["Link"])
+            continue
+        if art_datetime < time_limit:
+            dropped_links.append(row["Link"])
+        elif filtered != row["Category"] or timestr != row["Time"]:
+            updated_records.append(dict(row, Category=filtered, Time=timestr))
 
-    with FileLock(LOCK_FILE):
-        with open(CSV_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-            writer.writeheader()
-            writer.writerows(updated_records)
+    news_store.apply_changes(updated_records, dropped_links)
 
 # ----------------------------------------------------------------------------
 if __name__ == "__main__":
-    scrape()
-    fix_csv_times()
+    added = source.run()
+    print(f"... {added} articles added from FinancialExpress ...")
@@ -1,33 +1,23 @@
-import csv
 import os
 import sys
-import time
 from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from filelock import FileLock
-from pyvirtualdisplay import Display  # Virtual display support
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import news_browser, news_store
+from scrapers.news_source import NewsSource
 
 # === Settings ===
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CSV_FILE = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
-LOCK_FILE = CSV_FILE + ".lock"
 SOURCE = "Investing.com"
-HEADERS = ["Source", "Headline", "Link", "Category", "Time"]
 START_URL = "https://www.investing.com/news/latest-news"
 WAIT_TIMEOUT = 20
 
-# Hardcoded paths inside Docker image
-CHROMEDRIVER_PATH = "/usr/bin/chromedriver"
-CHROME_BINARY_PATH = "/usr/bin/chromium"
-
 def parse_category_from_link(link):
     try:
         path = urlparse(link).path
@@ -41,31 +31,6 @@ def parse_category_from_link(link):
         pass
     return ""
 
-def read_existing_links():
-    links = set()
-    if not os.path.exists(CSV_FILE):
-        return links
-    with FileLock(LOCK_FILE):
-        with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                links.add(row["Link"])
-    return links
-
-def append_new_articles(new_records):
-    existing_records = []
-    if os.path.exists(CSV_FILE):
-        with FileLock(LOCK_FILE):
-            with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                existing_records = list(reader)
-    with FileLock(LOCK_FILE):
-        with open(CSV_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=HEADERS)
-            writer.writeheader()
-            writer.writerows(new_records)
-            writer.writerows(existing_records)
-
 def extract_articles_from_html(html):
     soup = BeautifulSoup(html, "html.parser")
     articles = soup.find_all("article", attrs={"data-test": "article-item"})
@@ -90,73 +55,40 @@ def extract_articles_from_html(html):
         })
     return records
 
-def main():
-    with Display(visible=0, size=(1920, 1080)):
-        chrome_options = Options()
-        chrome_options.binary_location = CHROME_BINARY_PATH
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.page_load_strategy = "none"
-
-        prefs = {
-            "profile.managed_default_content_settings.images": 2,
-            "profile.managed_default_content_settings.stylesheets": 2,
-            "profile.managed_default_content_settings.fonts": 2
-        }
-        chrome_options.add_experimental_option("prefs", prefs)
+class InvestingSource(NewsSource):
+    name = SOURCE
 
-        driver = None
-        ul_html = None
+    def fetch_candidates(self):
+        # Investing.com turns headless browsers away
+        with news_browser.browser("display") as driver:
+            try:
+                print(f"Opening {START_URL} ...")
+                news_browser.load(driver, START_URL)
 
-        try:
-            driver = webdriver.Chrome(executable_path=CHROMEDRIVER_PATH, options=chrome_options)
-            driver.set_page_load_timeout(WAIT_TIMEOUT)
-            print(f"Opening {START_URL} ...")
-            driver.get(START_URL)
+                WebDriverWait(driver, WAIT_TIMEOUT, poll_frequency=1).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "ul[data-test='news-list']"))
+                )
+                ul_element = driver.find_element(By.CSS_SELECTOR, "ul[data-test='news-list']")
+                ul_html = ul_element.get_attribute('outerHTML')
 
-            time.sleep(5)
-            driver.execute_script("window.stop();")
+            except TimeoutException:
+                raise RuntimeError("Timeout waiting for Investing.com page or elements.")
 
-            WebDriverWait(driver, WAIT_TIMEOUT, poll_frequency=1).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "ul[data-test='news-list']"))
-            )
-            ul_element = driver.find_element(By.CSS_SELECTOR, "ul[data-test='news-list']")
-            ul_html = ul_element.get_attribute('outerHTML')
-
-        except TimeoutException:
-            print("ERROR: Timeout waiting for Investing.com page or elements.")
-            sys.exit(1)
-
-        except Exception as e:
-            print(f"ERROR: Problem loading Investing.com page: {e}")
-            sys.exit(1)
-
-        finally:
-            if driver:
-                driver.quit()
+            except Exception as e:
+                raise RuntimeError(f"Problem loading Investing.com page: {e}")
 
         if not ul_html:
             print("WARNING: Could not retrieve page content.")
             return
+        yield ul_html
 
-        existing_links = read_existing_links()
-        all_new_records = []
-
-        articles = extract_articles_from_html(ul_html)
-        for record in articles:
-            if record["Link"] in existing_links:
-                continue
-            all_new_records.append(record)
+    def parse(self, ul_html):
+        # Single listing page: skip known links instead of stopping at the first one
+        records = [r for r in extract_articles_from_html(ul_html) if not news_store.has_link(r["Link"])]
+        return records, True
 
-        if all_new_records:
-            append_new_articles(all_new_records)
-            print(f"{len(all_new_records)} new articles added from Investing.com.")
-        else:
-            print("No new Investing.com articles found.")
+source = InvestingSource()
 
 if __name__ == "__main__":
-    main()
+    added = source.run()
+    print(f"{added} new articles added from Investing.com.")
@@ -1,18 +1,17 @@
-import requests
 from bs4 import BeautifulSoup, Comment
-import pandas as pd
 import os
-import threading
+import sys
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import fetch_cache, news_store
+from scrapers.news_source import NewsSource
 
 # === CONFIG ===
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-NEWS_FILE = os.path.abspath(
-    os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv")
-)
 SOURCE = "Money Control"
-DATE_CUTOFF = datetime.now() - timedelta(hours=24)
 
 CATEGORIES = {
     "economy": "https://www.moneycontrol.com/news/business/economy",
@@ -23,15 +22,8 @@ CATEGORIES = {
     "real-estate": "https://www.moneycontrol.com/news/business/real-estate",
 }
 
-csv_lock = threading.Lock()
-
-# === LOAD EXISTING LINKS ===
-if os.path.exists(NEWS_FILE):
-    df_all = pd.read_csv(NEWS_FILE)
-    existing_links = set(df_all['Link'].tolist())
-else:
-    df_all = pd.DataFrame(columns=['Source','Headline','Link','Category','Time'])
-    existing_links = set()
+# Listing markup hashed to tell whether a page changed since the last run
+LISTING_SECTION = ('id="cagetory"', 'class="pagenation"')
 
 # === TIME PARSER ===
 def parse_time(text):
@@ -41,16 +33,22 @@ def parse_time(text):
     except Exception:
         return None
 
-# === SCRAPE ONE PAGE ===
-def scrape_page(url, category):
+# === FETCH ONE PAGE ===
+def page_url(base_url, page_num):
+    return base_url if page_num == 1 else f"{base_url}/page-{page_num}"
+
+def fetch_page(url):
     try:
-        resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        if resp.status_code != 200:
-            return [], False
+        page = fetch_cache.fetch(url, section=LISTING_SECTION, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        if page.status_code not in (200, 304):
+            return None
     except Exception:
-        return [], False
+        return None
+    return page
 
-    soup = BeautifulSoup(resp.text, 'html.parser')
+# === PARSE ONE PAGE ===
+def parse_page(html, category, cutoff):
+    soup = BeautifulSoup(html, 'html.parser')
     articles = soup.find_all('li', class_='clearfix')
 
     rows = []
@@ -88,14 +86,13 @@ def scrape_page(url, category):
             if not dt:
                 continue
 
-            if dt < DATE_CUTOFF:
+            if dt < cutoff:
                 stop_signal = True
                 break
 
-            with csv_lock:
-                if link in existing_links:
-                    stop_signal = True
-                    break
+            if news_store.has_link(link):
+                stop_signal = True
+                break
 
             # Valid new row
             rows.append({
@@ -111,40 +108,43 @@ def scrape_page(url, category):
 
     return rows, stop_signal
 
-# === THREAD WORKER ===
-def scrape_category(category, base_url):
-    page_num = 1
-
-    while True:
-        page_url = base_url if page_num == 1 else f"{base_url}/page-{page_num}"
-        rows, stop = scrape_page(page_url, category)
-
-        if rows:
-            with csv_lock:
-                if os.path.exists(NEWS_FILE):
-                    df_current = pd.read_csv(NEWS_FILE)
-                else:
-                    df_current = pd.DataFrame(columns=['Source','Headline','Link','Category','Time'])
-
-                df_new = pd.DataFrame(rows)
-                combined = pd.concat([df_new, df_current], ignore_index=True)
-                combined = combined.drop_duplicates(subset=['Link'])
-
-                combined.to_csv(NEWS_FILE, index=False)
-                existing_links.update(df_new['Link'].tolist())
-
-        if stop or not rows:
-            break
-
-        page_num += 1
-        time.sleep(1)
-
-# === START THREADS ===
-threads = []
-for cat, url in CATEGORIES.items():
-    t = threading.Thread(target=scrape_category, args=(cat, url))
-    threads.append(t)
-    t.start()
-
-for t in threads:
-    t.join()
+# === SOURCE ===
+class MoneyControlSource(NewsSource):
+    """Pages through every category at once; each category stops on its own"""
+
+    name = SOURCE
+    stop_ends_run = False
+
+    def fetch_candidates(self):
+        self.fetched_pages = []
+        pages = {category: 1 for category in CATEGORIES}
+        with ThreadPoolExecutor(max_workers=len(CATEGORIES)) as executor:
+            while pages:
+                categories = list(pages)
+                fetched = executor.map(lambda c: fetch_page(page_url(CATEGORIES[c], pages[c])), categories)
+                for category, page in list(zip(categories, fetched)):
+                    if page is not None:
+                        self.fetched_pages.append(page)
+                    stop = yield category, page
+                    if stop:
+                        del pages[category]
+                    else:
+                        pages[category] += 1
+                if pages:
+                    time.sleep(1)
+
+    def parse(self, candidate):
+        category, page = candidate
+        if page is None or not page.changed:
+            return [], True
+        rows, stop = parse_page(page.text, category, self.cutoff)
+        return rows, stop or not rows
+
+    def finalize(self):
+        fetch_cache.remember(self.fetched_pages)
+
+source = MoneyControlSource()
+
+if __name__ == "__main__":
+    added = source.run()
+    print(f"{added} articles added from Money Control.")
@@ -1,44 +1,21 @@
 import os
+import sys
 import time
-from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from datetime import datetime
 from selenium.webdriver.common.by import By
 from bs4 import BeautifulSoup
-import pandas as pd
-from filelock import FileLock
 
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CSV_FILE = os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv")
-CSV_FILE = os.path.abspath(CSV_FILE)
-LOCK_FILE = CSV_FILE + ".lock"
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from scrapers import news_browser, news_store
+from scrapers.news_source import NewsSource
 
 SOURCE_NAME = "NDTV Profit"
 BASE_URL = "https://www.ndtvprofit.com"
-CUTOFF_TIME = datetime.now() - timedelta(hours=24)
 ALLOWED_CATEGORIES = {"markets", "economy-finance", "ipos", "research-reports"}
-COLUMNS = ["Source", "Headline", "Link", "Category", "Time"]
-
-# === SETUP BROWSER ===
-options = Options()
-options.add_argument("--headless")
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
-driver = webdriver.Chrome(options=options)
-
-# === LOAD EXISTING HEADLINES FROM news_repository.csv ===
-def load_existing_headlines():
-    with FileLock(LOCK_FILE):
-        if not os.path.exists(CSV_FILE):
-            return set()
-        df = pd.read_csv(CSV_FILE)
-        if not all(col in df.columns for col in COLUMNS):
-            df = pd.DataFrame(columns=COLUMNS)
-            df.to_csv(CSV_FILE, index=False)
-        return set(df["Headline"].dropna().tolist())
-
-existing_headlines = load_existing_headlines()
-session_headlines = set()
+
+LATEST_URL = "https://www.ndtvprofit.com/the-latest?src=topnav"
+MORE_STORIES_XPATH = '//button[contains(translate(text(), "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "more stories")]'
 
 # === TIME PARSER ===
 def parse_timestamp(time_str):
@@ -52,8 +29,8 @@ def parse_timestamp(time_str):
         return None
 
 # === SCRAPING FUNCTION ===
-def extract_articles():
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
+def extract_articles(page_source, cutoff):
+    soup = BeautifulSoup(page_source, 'html.parser')
     containers = soup.find_all("div", class_=lambda x: x and "image-and-title-m__story-details" in x)
     results = []
     stop_flag = False
@@ -78,14 +55,12 @@ def extract_articles():
 
             if not dt:
                 continue
-            if dt < CUTOFF_TIME:
+            if dt < cutoff:
                 stop_flag = True
                 break
-            if headline in existing_headlines:
+            if news_store.has_headline(headline):
                 stop_flag = True
                 break
-            if headline in session_headlines:
-                continue
             if category not in ALLOWED_CATEGORIES:
                 continue
 
@@ -96,49 +71,40 @@ def extract_articles():
                 "Category": category,
                 "Time": dt.isoformat()
             })
-            session_headlines.add(headline)
 
         except:
             continue
 
     return results, stop_flag
 
-# === MAIN SCRAPING LOOP ===
-driver.get("https://www.ndtvprofit.com/the-latest?src=topnav")
-time.sleep(5)
+# === SOURCE ===
+class NDTVProfitSource(NewsSource):
+    name = SOURCE_NAME
 
-all_articles = []
-should_stop = False
+    def fetch_candidates(self):
+        with news_browser.browser() as driver:
+            news_browser.load(driver, LATEST_URL)
+            time.sleep(5)
 
-while not should_stop:
-    batch, should_stop = extract_articles()
-    all_articles.extend(batch)
+            while True:
+                yield driver.page_source
 
-    if not should_stop:
-        buttons = driver.find_elements(By.XPATH, '//button[contains(translate(text(), "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "more stories")]')
-        if not buttons:
-            break
+                buttons = driver.find_elements(By.XPATH, MORE_STORIES_XPATH)
+                if not buttons:
+                    return
 
-        try:
-            time.sleep(2)  # polite delay before clicking
-            driver.execute_script("arguments[0].click();", buttons[0])
-            time.sleep(4)
-        except:
-            break
-
-driver.quit()
-
-# === SAVE TO news_repository.csv ===
-if all_articles:
-    new_df = pd.DataFrame(all_articles, columns=COLUMNS)
-    with FileLock(LOCK_FILE):
-        if os.path.exists(CSV_FILE):
-            existing_df = pd.read_csv(CSV_FILE)
-            if not all(col in existing_df.columns for col in COLUMNS):
-                existing_df = pd.DataFrame(columns=COLUMNS)
-            combined_df = pd.concat([new_df, existing_df], ignore_index=True)
-            combined_df = combined_df.drop_duplicates(subset=["Headline"])
-        else:
-            combined_df = new_df
-
-        combined_df.to_csv(CSV_FILE, index=False)
+                try:
+                    time.sleep(2)  # polite delay before clicking
+                    driver.execute_script("arguments[0].click();", buttons[0])
+                    time.sleep(4)
+                except Exception:
+                    return
+
+    def parse(self, page_source):
+        return extract_articles(page_source, self.cutoff)
+
+source = NDTVProfitSource()
+
+if __name__ == "__main__":
+    added = source.run()
+    print(f"{added} articles added from NDTV Profit.")
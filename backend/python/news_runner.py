@@ -0,0 +1,185 @@
+import datetime
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cleaner
+
+# === CONFIG ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_FILE = os.path.join(SCRIPT_DIR, "news_run_report.json")
+
+# Modules in news/ that each expose a `source` (scrapers.news_source.NewsSource)
+NEWS_MODULES = [
+    "business_line", "business_std", "cnbctv_18",
+    "econ_times", "fin_exp", "ft",
+    "investing", "money_control", "ndtvprofit",
+]
+
+# Sources run at the same time, and seconds each may spend fetching. A source
+# stops fetching new pages at its deadline; one stuck past it for TIMEOUT_GRACE
+# more seconds is reported as timed out and no longer waited for.
+NEWS_PARALLELISM = int(os.environ.get("NEWS_PARALLELISM", 4))
+NEWS_SOURCE_TIMEOUT = int(os.environ.get("NEWS_SOURCE_TIMEOUT", 240))
+TIMEOUT_GRACE = 60
+POLL_SECONDS = 1
+
+_cycle_lock = threading.Lock()
+_sources = {}
+_load_errors = {}
+_source_locks = {}
+
+
+def load_sources():
+    """Import every news module once; later cycles reuse the loaded sources and retry failed imports"""
+    for module_name in NEWS_MODULES:
+        if module_name in _sources:
+            continue
+        try:
+            module = importlib.import_module(f"news.{module_name}")
+            _sources[module_name] = module.source
+            _source_locks[module_name] = threading.Lock()
+            _load_errors.pop(module_name, None)
+        except Exception as e:
+            _load_errors[module_name] = f"import failed: {e}"
+            print(f"[ERROR] Could not load news source {module_name}: {e}")
+    return _sources
+
+
+def run_source(module_name, timeout, started):
+    """Run one loaded source in this thread and describe how it went"""
+    source = _sources[module_name]
+    lock = _source_locks[module_name]
+    result = {"module": module_name, "source": source.name, "items": None, "error": None}
+
+    if not lock.acquire(blocking=False):
+        # Still running from an earlier cycle that gave up waiting for it
+        result.update(status="busy", duration=0.0, error="previous run still in progress")
+        return result
+
+    start = time.monotonic()
+    started[module_name] = start
+    try:
+        result["items"] = source.run(deadline=start + timeout)
+        result["status"] = "ok"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e) or type(e).__name__
+        print(f"[ERROR] News source {module_name} failed:\n{traceback.format_exc()}")
+    finally:
+        lock.release()
+    result["duration"] = round(time.monotonic() - start, 2)
+    return result
+
+
+def run_cleaner():
+    start = time.monotonic()
+    try:
+        cleaner.clean_news_store()
+        status, error = "ok", None
+    except Exception as e:
+        status, error = "failed", str(e)
+        print(f"[ERROR] News cleaner failed:\n{traceback.format_exc()}")
+    return {"status": status, "duration": round(time.monotonic() - start, 2), "error": error}
+
+
+def write_report(report):
+    tmp_path = REPORT_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, REPORT_FILE)
+
+
+def load_report():
+    if not os.path.exists(REPORT_FILE):
+        return None
+    try:
+        with open(REPORT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _wait_for_sources(futures, started, timeout):
+    """Wait for every source, giving up on ones stuck well past their deadline"""
+    results = {}
+    pending = dict(futures)
+    # Queued sources can't start if every worker is stuck; bound the whole wait
+    give_up_at = time.monotonic() + (timeout + TIMEOUT_GRACE) * max(1, len(futures))
+
+    while pending:
+        wait(list(pending.values()), timeout=POLL_SECONDS)
+        now = time.monotonic()
+        for module_name, future in list(pending.items()):
+            if future.done():
+                results[module_name] = future.result()
+                del pending[module_name]
+            elif module_name in started and now - started[module_name] > timeout + TIMEOUT_GRACE:
+                results[module_name] = {
+                    "module": module_name, "source": _sources[module_name].name,
+                    "status": "timeout", "duration": round(now - started[module_name], 2),
+                    "items": None, "error": f"still running {timeout + TIMEOUT_GRACE}s after start",
+                }
+                del pending[module_name]
+            elif now > give_up_at:
+                future.cancel()
+                results[module_name] = {
+                    "module": module_name, "source": _sources[module_name].name,
+                    "status": "skipped", "duration": 0.0,
+                    "items": None, "error": "never started: no free worker",
+                }
+                del pending[module_name]
+    return results
+
+
+def run_news_cycle(parallelism=NEWS_PARALLELISM, timeout=NEWS_SOURCE_TIMEOUT):
+    """
+    Runs every news source in-process, at most `parallelism` at once and each
+    with a `timeout` second budget, then cleans the store and regenerates the
+    CSV once. Returns the run report, which is also saved to news_run_report.json.
+    """
+    with _cycle_lock:
+        started_at = datetime.datetime.now()
+        start = time.monotonic()
+        sources = load_sources()
+
+        started = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="news")
+        futures = {name: executor.submit(run_source, name, timeout, started) for name in sources}
+        results = _wait_for_sources(futures, started, timeout)
+        # Don't block on sources that overran; their rows are exported next cycle
+        executor.shutdown(wait=False)
+
+        source_reports = [results[name] for name in sources]
+        source_reports += [
+            {"module": name, "source": None, "status": "failed", "duration": 0.0, "items": None, "error": error}
+            for name, error in _load_errors.items()
+        ]
+
+        report = {
+            "started_at": started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "finished_at": None,
+            "duration": None,
+            "parallelism": parallelism,
+            "timeout": timeout,
+            "sources": source_reports,
+            "cleaner": run_cleaner(),
+        }
+        report["finished_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        report["duration"] = round(time.monotonic() - start, 2)
+        write_report(report)
+        return report
+
+
+if __name__ == "__main__":
+    summary = run_news_cycle()
+    for source in summary["sources"]:
+        print(f"{source['module']:<16} {source['status']:<8} {source['duration']:>7.1f}s  items={source['items']}")
+    print(f"Cycle finished in {summary['duration']:.1f}s")
@@ -0,0 +1,154 @@
+import asyncio
+import os
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# === PATH SETUP ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(SCRIPT_DIR, "price_data")
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Parquet schema metadata keys recording the date range already requested
+# from Yahoo. Listings younger than the range start never have bars that far
+# back, so coverage can't be inferred from the bars themselves.
+COVERED_FROM_KEY = b"covered_from"
+COVERED_TO_KEY = b"covered_to"
+
+
+def _symbol_path(symbol):
+    return os.path.join(STORE_DIR, f"{quote(symbol, safe='')}.parquet")
+
+
+def _empty_frame():
+    df = pd.DataFrame(columns=OHLCV_COLUMNS, dtype='float64')
+    df.index = pd.DatetimeIndex([], name='Date')
+    return df
+
+
+def load_prices(symbol):
+    """Load stored daily bars for a symbol. Returns (df, covered_from, covered_to)."""
+    path = _symbol_path(symbol)
+    if not os.path.exists(path):
+        return _empty_frame(), None, None
+    try:
+        table = pq.read_table(path)
+    except Exception as e:
+        print(f"⚠️ Corrupt price store file for {symbol}, discarding: {e}")
+        os.remove(path)
+        return _empty_frame(), None, None
+
+    metadata = table.schema.metadata or {}
+    covered_from = metadata.get(COVERED_FROM_KEY)
+    covered_to = metadata.get(COVERED_TO_KEY)
+    df = table.to_pandas()
+    return (
+        df,
+        pd.Timestamp(covered_from.decode()) if covered_from else None,
+        pd.Timestamp(covered_to.decode()) if covered_to else None,
+    )
+
+
+def save_prices(symbol, df, covered_from, covered_to):
+    """Atomically write a symbol's bars together with the covered date range."""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[COVERED_FROM_KEY] = covered_from.isoformat().encode()
+    metadata[COVERED_TO_KEY] = covered_to.isoformat().encode()
+    table = table.replace_schema_metadata(metadata)
+
+    path = _symbol_path(symbol)
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def discard_prices(symbol):
+    path = _symbol_path(symbol)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def split_since_stored(df, fetched):
+    """
+    True when the tail response reports a split after the last stored bar.
+    Yahoo re-scales all earlier closes for a split, so the stored bars no
+    longer line up with newly fetched ones.
+    """
+    tail = fetched.get("tail")
+    if tail is None or tail.empty or df.empty:
+        return False
+    last_day = df.index[-1].normalize()
+    return any(split.normalize() > last_day for split in tail.attrs.get("splits", ()))
+
+
+def missing_ranges(df, covered_from, covered_to, period1, period2):
+    """
+    Ranges still to request for period1..period2, as [(edge, start, end)]
+    where edge is "full", "head" or "tail".
+    """
+    if df.empty or covered_from is None or covered_to is None:
+        return [("full", period1, period2)]
+
+    # Both gap requests overlap one stored bar, so an empty response means
+    # the fetch failed and the coverage is left alone for the next run.
+    ranges = []
+    if period1 < covered_from:
+        ranges.append(("head", period1, df.index[0] + pd.Timedelta(days=1)))
+    if period2 > covered_to:
+        # Re-request from the last stored bar so a bar stored before the
+        # session closed gets overwritten with its final values.
+        ranges.append(("tail", df.index[-1].normalize(), period2))
+    return ranges
+
+
+def merge_fetched(symbol, df, covered_from, covered_to, period1, period2, fetched):
+    """
+    Fold {edge: frame} responses into the stored bars, advance coverage for
+    every non-empty edge, persist, and return the period1..period2 slice.
+    """
+    frames = []
+    for edge, frame in fetched.items():
+        if frame is None or frame.empty:
+            continue
+        frames.append(frame)
+        if edge in ("full", "head"):
+            covered_from = period1
+        if edge in ("full", "tail"):
+            covered_to = period2
+
+    if frames:
+        df = pd.concat([df] + frames)
+        # One bar per day: a final bar replaces the intraday one stored before the close
+        df = df[~df.index.normalize().duplicated(keep='last')].sort_index()
+        save_prices(symbol, df, covered_from, covered_to)
+
+    return df[(df.index >= period1) & (df.index <= period2)]
+
+
+async def get_prices_async(symbol, period1, period2, fetch):
+    """
+    Return daily bars for symbol between period1 and period2, reading from the
+    local store and awaiting fetch(symbol, start, end) only for the missing
+    range. Parquet reads and writes run in worker threads so they don't stall
+    other downloads.
+    """
+    period1 = pd.Timestamp(period1)
+    period2 = pd.Timestamp(period2)
+
+    df, covered_from, covered_to = await asyncio.to_thread(load_prices, symbol)
+    fetched = {}
+    for edge, start, end in missing_ranges(df, covered_from, covered_to, period1, period2):
+        fetched[edge] = await fetch(symbol, start, end)
+    if split_since_stored(df, fetched):
+        print(f"🔁 {symbol} split since last fetch, refetching full history")
+        await asyncio.to_thread(discard_prices, symbol)
+        df, covered_from, covered_to = _empty_frame(), None, None
+        fetched = {"full": await fetch(symbol, period1, period2)}
+    return await asyncio.to_thread(
+        merge_fetched, symbol, df, covered_from, covered_to, period1, period2, fetched
+    )
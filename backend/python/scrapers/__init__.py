@@ -1,3 +0,0 @@
-from . import bulk_block
-from . import company_data
-from . import common
\ No newline at end of file
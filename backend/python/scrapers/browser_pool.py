@@ -0,0 +1,94 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+from .common import log_debug
+
+
+class _PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Keeps up to `size` long-lived Selenium drivers built by `factory` and lends
+    them out one at a time. A driver is reset between borrowers, and replaced
+    after `max_uses` loans or as soon as it stops responding.
+    """
+
+    def __init__(self, factory, size=2, max_uses=20):
+        self.factory = factory
+        self.max_uses = max_uses
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = queue.LifoQueue()
+        self.closed = False
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver: `with pool.driver() as driver: ...`"""
+        self.slots.acquire()
+        try:
+            browser = self._checkout()
+        except Exception:
+            self.slots.release()
+            raise
+
+        try:
+            yield browser.driver
+        finally:
+            browser.uses += 1
+            try:
+                self._checkin(browser)
+            finally:
+                self.slots.release()
+
+    def _checkout(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return _PooledBrowser(self.factory())
+
+    def _checkin(self, browser):
+        if self.closed or browser.uses >= self.max_uses or not self._reset(browser.driver):
+            log_debug(f"[BROWSER POOL] Recycling driver after {browser.uses} uses")
+            self._quit(browser.driver)
+            return
+        self.idle.put(browser)
+
+    @staticmethod
+    def _reset(driver):
+        """Clear cookies and storage so the next borrower starts clean; False if the driver is dead"""
+        try:
+            driver.delete_all_cookies()
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        try:
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quit every idle driver; drivers still on loan are quit when returned"""
+        self.closed = True
+        while True:
+            try:
+                self._quit(self.idle.get_nowait().driver)
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
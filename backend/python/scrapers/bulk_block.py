@@ -1,9 +1,11 @@
 import os
+import json
+import threading
 import time
 import re
-import requests
 import traceback
 from datetime import datetime, timedelta
+import lxml.html
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -12,7 +14,20 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
 import concurrent.futures
-from .common import log_debug, get_csv_path, append_unique_rows, check_system_resources, remove_duplicates_from_csv_with_header
+from . import http_client, rate_limiter
+from .nse_session import NSE_HEADERS, nse_session
+from .concurrency import AdaptiveLimiter
+from . import deal_store
+from .common import log_debug, get_csv_path
+
+NSE_DEALS_URL = "https://www.nseindia.com/api/historicalOR/bulk-block-short-deals"
+NSE_DEALS_REFERER = "https://www.nseindia.com/report-detail/display-bulk-and-block-deals"
+
+# Deal scrapers in flight, tuned between 1 and 4 by the concurrency monitor
+deals_limiter = AdaptiveLimiter(
+    "bulk_block", 2, minimum=1, maximum=4,
+    hosts=("www.nseindia.com", "www.bseindia.com")
+)
 
 def create_driver():
     options = Options()
@@ -32,226 +47,234 @@ def create_driver():
     driver.set_page_load_timeout(30)
     return driver
 
-def scrape_bse_bulk():
-    for attempt in range(3):
+# kind -> (page url, table name, note span name, csv file, buy label, sell label, log label)
+BSE_DEAL_PAGES = {
+    "bulk": (
+        "https://www.bseindia.com/markets/equity/EQReports/bulk_deals.aspx",
+        "bulkdeals", "notedate", "bulk_deals.csv", "BUY", "SELL", "Bulk"
+    ),
+    "block": (
+        "https://www.bseindia.com/markets/equity/EQReports/block_deals.aspx",
+        "block", "note", "block_deals.csv", "Buy", "Sell", "Block"
+    ),
+}
+BSE_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/138.0.0.0 Safari/537.36"
+    ),
+    "Referer": "https://www.bseindia.com/",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+def build_bse_deal_rows(table_rows, buy_label, sell_label):
+    """Table cells -> CSV rows: exchange, date, then everything after the scrip code"""
+    deals = []
+    for cells in table_rows:
+        if len(cells) < 5:
+            continue
+        if cells[4] == "B":
+            cells[4] = buy_label
+        elif cells[4] == "S":
+            cells[4] = sell_label
+        deals.append(["BSE"] + [cells[0]] + cells[2:])
+    return deals
+
+def fetch_bse_deals_http(url, table_name, note_name):
+    """
+    Read the deals table straight from the ASPX page. Returns (rows, date_string),
+    or None when the table is missing or only holds unrendered template rows,
+    in which case the page needs a browser.
+    """
+    response = http_client.get(url, headers=BSE_HEADERS, timeout=15)
+    response.raise_for_status()
+    tree = lxml.html.fromstring(response.content)
+
+    tables = tree.xpath(f"//table[contains(@name, '{table_name}')]")
+    if not tables:
+        return None
+    table_rows = []
+    for tr in tables[0].xpath(".//tbody/tr"):
+        cells = [td.text_content().strip() for td in tr.xpath("./td")]
+        if any("{{" in cell for cell in cells):
+            return None
+        table_rows.append(cells)
+
+    notes = tree.xpath(f"//span[contains(@name, '{note_name}')]")
+    date_string = notes[0].text_content().strip() if notes else ""
+    return table_rows, date_string
+
+def fetch_bse_deals_browser(url, table_name, note_name):
+    """Selenium fallback for when the table is only rendered client-side"""
+    driver = create_driver()
+    try:
+        rate_limiter.acquire(url)
+        driver.get(url)
+        WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, f"span[name*='{note_name}']"))
+        )
+        soup = BeautifulSoup(driver.page_source, "html.parser")
+        date_string = soup.find('span', attrs={'name': re.compile(note_name)}).get_text(strip=True)
+        table = soup.find('table', attrs={'name': re.compile(table_name)})
+        table_rows = [
+            [cell.get_text(strip=True) for cell in row.find_all('td')]
+            for row in table.find('tbody').find_all('tr')
+        ]
+        return table_rows, date_string
+    finally:
         try:
-            check_system_resources()
-            driver = create_driver()
-            bulk_url = "https://www.bseindia.com/markets/equity/EQReports/bulk_deals.aspx"
-            driver.get(bulk_url)
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "span[name*='notedate']"))
-            )
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            date_string = soup.find('span', attrs={'name': re.compile(r'notedate')}).get_text(strip=True)
-            table = soup.find('table', attrs={'name': re.compile(r'bulkdeals')})
-            bulks = []
-            body = table.find('tbody')
-            rows = body.find_all('tr')
-            for row in rows:
-                cells = [cell.get_text(strip=True) for cell in row.find_all('td')]
-                if len(cells) >= 1:
-                    if cells[4] == "B":
-                        cells[4] = "BUY"
-                    elif cells[4] == "S":
-                        cells[4] = "SELL"
-                    bulks.append(["BSE"] + [cells[0]] + cells[2:])
-            append_unique_rows("bulk_deals.csv", bulks)
-            print(f"BSE Bulk Deals extracted ({date_string})")
-            return
-        except Exception as e:
-            print(f"BSE Bulk attempt {attempt+1}/3 failed: {str(e)[:100]}")
-            time.sleep(2 ** attempt)
-        finally:
-            try:
-                driver.quit()
-            except:
-                pass
+            driver.quit()
+        except:
+            pass
+
+def scrape_bse_deals(kind):
+    url, table_name, note_name, csv_filename, buy_label, sell_label, label = BSE_DEAL_PAGES[kind]
+
+    try:
+        result = fetch_bse_deals_http(url, table_name, note_name)
+        if result is None:
+            log_debug(f"[BSE {label.upper()}] Table not in static HTML, falling back to browser")
+    except Exception as e:
+        log_debug(f"[BSE {label.upper()}] HTTP fetch failed, falling back to browser: {e}")
+        result = None
 
-def scrape_bse_block():
     for attempt in range(3):
         try:
-            check_system_resources()
-            driver = create_driver()
-            block_bse_url = "https://www.bseindia.com/markets/equity/EQReports/block_deals.aspx"
-            driver.get(block_bse_url)
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "span[name*='note']"))
-            )
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            date_string = soup.find('span', attrs={'name': re.compile(r'note')}).get_text(strip=True)
-            table = soup.find('table', attrs={'name': re.compile(r'block')})
-            bse_blocks = []
-            body = table.find('tbody')
-            rows = body.find_all('tr')
-            for row in rows:
-                cells = [cell.get_text(strip=True) for cell in row.find_all('td')]
-                if len(cells) >= 1:
-                    if cells[4] == "B":
-                        cells[4] = "Buy"
-                    elif cells[4] == "S":
-                        cells[4] = "Sell"
-                    bse_blocks.append(["BSE"] + [cells[0]] + cells[2:])
-            append_unique_rows("block_deals.csv", bse_blocks)
-            print(f"BSE Block Deals extracted ({date_string})")
+            if result is None:
+                result = fetch_bse_deals_browser(url, table_name, note_name)
+            table_rows, date_string = result
+            deal_store.insert_rows(csv_filename, build_bse_deal_rows(table_rows, buy_label, sell_label))
+            print(f"BSE {label} Deals extracted ({date_string})")
             return
         except Exception as e:
-            print(f"BSE Block attempt {attempt+1}/3 failed: {str(e)[:100]}")
+            result = None
+            print(f"BSE {label} attempt {attempt+1}/3 failed: {str(e)[:100]}")
             time.sleep(2 ** attempt)
-        finally:
-            try:
-                driver.quit()
-            except:
-                pass
 
-def scrape_nse_bulk():
-    for attempt in range(3):
-        try:
-            check_system_resources()
-            today = datetime.today()
-            to_date = today.strftime("%d-%m-%Y")
-            from_date = (today - timedelta(days=30)).strftime("%d-%m-%Y")
-
-            log_debug(f"[NSE BULK] Attempt {attempt+1}: from={from_date} to={to_date}")
+def scrape_bse_bulk():
+    scrape_bse_deals("bulk")
 
-            headers = {
-                'accept': '*/*',
-                'accept-language': 'en-GB,en;q=0.5',
-                'priority': 'u=1, i',
-                'referer': 'https://www.nseindia.com/report-detail/display-bulk-and-block-deals',
-                'sec-ch-ua': '"Brave";v="137", "Chromium";v="137", "Not/A)Brand";v="24"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"windows"',
-                'sec-fetch-dest': 'empty',
-                'sec-fetch-mode': 'cors',
-                'sec-fetch-site': 'same-origin',
-                'sec-gpc': '1',
-                'user-agent': 'Mozilla/5.0'
-            }
-            params = {
-                'optionType': 'bulk_deals',
-                'from': from_date,
-                'to': to_date,
-            }
+def scrape_bse_block():
+    scrape_bse_deals("block")
 
-            session = requests.Session()
-            homepage_resp = session.get('https://www.nseindia.com/', headers=headers, timeout=10)
-            log_debug(f"[NSE BULK] Homepage GET status={homepage_resp.status_code}")
+# option type -> (csv file, label used in logs)
+NSE_DEAL_TYPES = {
+    "bulk_deals": ("bulk_deals.csv", "Bulk"),
+    "block_deals": ("block_deals.csv", "Block"),
+}
+NSE_LOOKBACK_DAYS = 30
+NSE_STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nse_deals_state.json")
+nse_state_lock = threading.Lock()
 
-            response = session.get(
-                'https://www.nseindia.com/api/historicalOR/bulk-block-short-deals',
-                params=params,
-                headers=headers,
-                timeout=15
-            )
-            log_debug(f"[NSE BULK] API GET status={response.status_code}")
+def load_nse_deal_state():
+    if not os.path.exists(NSE_STATE_FILE):
+        return {}
+    try:
+        with open(NSE_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log_debug(f"[NSE DEALS] Ignoring unreadable state file: {e}")
+        return {}
 
-            response.raise_for_status()
+def record_nse_deal_date(option_type, latest):
+    """Advance the last ingested deal date for an option type"""
+    with nse_state_lock:
+        state = load_nse_deal_state()
+        previous = state.get(option_type)
+        if previous and datetime.strptime(previous, "%Y-%m-%d") >= latest:
+            return
+        state[option_type] = latest.strftime("%Y-%m-%d")
+        tmp_path = NSE_STATE_FILE + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, NSE_STATE_FILE)
 
-            try:
-                data = response.json()
-                log_debug(f"[NSE BULK] Response JSON keys: {list(data.keys())}")
-            except Exception as je:
-                log_debug(f"[NSE BULK] JSON decode error: {je}")
-                log_debug(f"[NSE BULK] Raw response text:\n{response.text}")
-                raise
+def nse_deal_window_start(option_type, csv_filename, today):
+    """
+    Start of the window still to fetch: the last ingested deal date (re-fetched,
+    NSE can add late rows for it), capped at NSE_LOOKBACK_DAYS. Falls back to
+    the full lookback when nothing has been ingested or the CSV is gone.
+    """
+    earliest = today - timedelta(days=NSE_LOOKBACK_DAYS)
+    last = load_nse_deal_state().get(option_type)
+    if not last or not os.path.isfile(get_csv_path(csv_filename)):
+        return earliest
+    return max(earliest, datetime.strptime(last, "%Y-%m-%d"))
 
-            nse_bulk = []
-            for record in data.get('data', []):
-                original_date = record['BD_DT_DATE']
-                dt = datetime.strptime(original_date, "%d-%b-%Y")
-                formatted_date = dt.strftime("%d/%m/%Y")
-                nse_bulk.append([
-                    'NSE',
-                    formatted_date,
-                    record['BD_SYMBOL'],
-                    record['BD_CLIENT_NAME'],
-                    record['BD_BUY_SELL'],
-                    record['BD_QTY_TRD'],
-                    record['BD_TP_WATP']
-                ])
-            append_unique_rows("bulk_deals.csv", nse_bulk)
-            print(f"NSE Bulk Deals extracted")
-            return
-        except Exception as e:
-            log_debug(f"[NSE BULK] Exception:\n{traceback.format_exc()}")
-            print(f"NSE Bulk attempt {attempt+1}/3 failed: {str(e)[:100]}")
-            time.sleep(2 ** attempt)
+def parse_nse_deal_record(record):
+    """One bulk-block-short-deals record -> (CSV row, deal date)"""
+    dt = datetime.strptime(record['BD_DT_DATE'], "%d-%b-%Y")
+    row = [
+        'NSE',
+        dt.strftime("%d/%m/%Y"),
+        record['BD_SYMBOL'],
+        record['BD_CLIENT_NAME'],
+        record['BD_BUY_SELL'],
+        str(record['BD_QTY_TRD']),
+        str(record['BD_TP_WATP'])
+    ]
+    return row, dt
 
-def scrape_nse_block():
+def scrape_nse_deals(option_type):
+    csv_filename, label = NSE_DEAL_TYPES[option_type]
+    tag = f"[NSE {label.upper()}]"
     for attempt in range(3):
         try:
-            check_system_resources()
             today = datetime.today()
             to_date = today.strftime("%d-%m-%Y")
-            from_date = (today - timedelta(days=30)).strftime("%d-%m-%Y")
+            from_date = nse_deal_window_start(option_type, csv_filename, today).strftime("%d-%m-%Y")
 
-            log_debug(f"[NSE BLOCK] Attempt {attempt+1}: from={from_date} to={to_date}")
+            log_debug(f"{tag} Attempt {attempt+1}: from={from_date} to={to_date}")
 
-            headers = {
-                'accept': '*/*',
-                'accept-language': 'en-GB,en;q=0.5',
-                'priority': 'u=1, i',
-                'referer': 'https://www.nseindia.com/report-detail/display-bulk-and-block-deals',
-                'sec-ch-ua': '"Brave";v="137", "Chromium";v="137", "Not/A)Brand";v="24"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"windows"',
-                'sec-fetch-dest': 'empty',
-                'sec-fetch-mode': 'cors',
-                'sec-fetch-site': 'same-origin',
-                'sec-gpc': '1',
-                'user-agent': 'Mozilla/5.0'
-            }
+            headers = dict(NSE_HEADERS, referer=NSE_DEALS_REFERER)
             params = {
-                'optionType': 'block_deals',
+                'optionType': option_type,
                 'from': from_date,
                 'to': to_date,
             }
 
-            session = requests.Session()
-            homepage_resp = session.get('https://www.nseindia.com/', headers=headers, timeout=10)
-            log_debug(f"[NSE BLOCK] Homepage GET status={homepage_resp.status_code}")
-
-            response = session.get(
-                'https://www.nseindia.com/api/historicalOR/bulk-block-short-deals',
+            # Cookies come from one shared warm-up, refreshed only on expiry or 401/403
+            response = nse_session.get(
+                NSE_DEALS_URL,
                 params=params,
                 headers=headers,
                 timeout=15
             )
-            log_debug(f"[NSE BLOCK] API GET status={response.status_code}")
+            log_debug(f"{tag} API GET status={response.status_code}")
 
             response.raise_for_status()
 
             try:
                 data = response.json()
-                log_debug(f"[NSE BLOCK] Response JSON keys: {list(data.keys())}")
+                log_debug(f"{tag} Response JSON keys: {list(data.keys())}")
             except Exception as je:
-                log_debug(f"[NSE BLOCK] JSON decode error: {je}")
-                log_debug(f"[NSE BLOCK] Raw response text:\n{response.text}")
+                log_debug(f"{tag} JSON decode error: {je}")
+                log_debug(f"{tag} Raw response text:\n{response.text}")
                 raise
 
-            nse_block = []
+            rows = []
+            latest = None
             for record in data.get('data', []):
-                original_date = record['BD_DT_DATE']
-                dt = datetime.strptime(original_date, "%d-%b-%Y")
-                formatted_date = dt.strftime("%d/%m/%Y")
-                nse_block.append([
-                    'NSE',
-                    formatted_date,
-                    record['BD_SYMBOL'],
-                    record['BD_CLIENT_NAME'],
-                    record['BD_BUY_SELL'],
-                    record['BD_QTY_TRD'],
-                    record['BD_TP_WATP']
-                ])
-            append_unique_rows("block_deals.csv", nse_block)
-            print(f"NSE Block Deals extracted")
+                row, dt = parse_nse_deal_record(record)
+                rows.append(row)
+                latest = dt if latest is None else max(latest, dt)
+            deal_store.insert_rows(csv_filename, rows)
+            if latest:
+                record_nse_deal_date(option_type, latest)
+            print(f"NSE {label} Deals extracted ({len(rows)} rows since {from_date})")
             return
         except Exception as e:
-            log_debug(f"[NSE BLOCK] Exception:\n{traceback.format_exc()}")
-            print(f"NSE Block attempt {attempt+1}/3 failed: {str(e)[:100]}")
+            log_debug(f"{tag} Exception:\n{traceback.format_exc()}")
+            print(f"NSE {label} attempt {attempt+1}/3 failed: {str(e)[:100]}")
             time.sleep(2 ** attempt)
 
+def scrape_nse_bulk():
+    scrape_nse_deals("bulk_deals")
+
+def scrape_nse_block():
+    scrape_nse_deals("block_deals")
+
 def run_bulk_block_scrapers():
     start_time = time.time()
     tasks = [
@@ -261,17 +284,20 @@ def run_bulk_block_scrapers():
         scrape_nse_block
     ]
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-        futures = [executor.submit(task) for task in tasks]
+    def run(task):
+        with deals_limiter.slot():
+            task()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=deals_limiter.maximum) as executor:
+        futures = [executor.submit(run, task) for task in tasks]
         for future in concurrent.futures.as_completed(futures):
             try:
                 future.result()
             except:
                 pass
     
+    # The CSVs the frontend reads are regenerated once from the deal store
     for filename in ["bulk_deals.csv", "block_deals.csv"]:
-        full_path = get_csv_path(filename)
-        if os.path.exists(full_path):
-            remove_duplicates_from_csv_with_header(full_path)
+        deal_store.export_csv(filename)
     
     print(f"Bulk/Block scraping completed in {time.time()-start_time:.2f} seconds")
\ No newline at end of file
@@ -1,9 +1,5 @@
 import os
 import csv
-import threading
-import psutil
-import gc
-import time
 import pandas as pd
 from datetime import datetime
 
@@ -13,14 +9,6 @@ CSV_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "../../../frontend/static/ass
 LOG_FILE_PATH = os.path.join(SCRIPT_DIR, "scraper_log.txt")
 USER_PORTFOLIO_CSV = os.path.abspath(os.path.join(SCRIPT_DIR, "../../user_portfolio.csv"))
 
-# === FILE LOCKS ===
-file_locks = {
-    "bulk_deals.csv": threading.Lock(),
-    "block_deals.csv": threading.Lock(),
-    "announcements.csv": threading.Lock(),
-    "insider_trading.csv": threading.Lock()
-}
-
 def get_csv_path(filename):
     return os.path.join(CSV_DIR, filename)
 
@@ -47,32 +35,6 @@ def load_portfolio_symbols(only_new=False):
         print(f"[ERROR] Could not read user_portfolio.csv: {e}")
         return []
 
-def append_unique_rows(csv_filename, new_rows, header=None):
-    full_path = get_csv_path(csv_filename)
-    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-    with file_locks[csv_filename]:
-        existing = set()
-
-        if os.path.isfile(full_path):
-            with open(full_path, 'r', newline='') as f:
-                reader = csv.reader(f)
-                if header:
-                    try:
-                        next(reader)
-                    except StopIteration:
-                        pass
-                existing.update(tuple(row) for row in reader)
-
-        unique = [row for row in new_rows if tuple(row) not in existing]
-
-        if unique:
-            mode = 'a' if os.path.isfile(full_path) else 'w'
-            with open(full_path, mode, newline='') as f:
-                writer = csv.writer(f)
-                if mode == 'w' and header:
-                    writer.writerow(header)
-                writer.writerows(unique)
-
 def remove_duplicates_from_csv_with_header(file_path):
     seen = set()
     with open(file_path, 'r', newline='') as f:
@@ -106,24 +68,6 @@ def remove_duplicates_from_csv_with_header(file_path):
         writer.writerow(header)
         writer.writerows(rows)
 
-def check_system_resources():
-    cpu_threshold = 80
-    mem_threshold = 85
-    wait_time = 5
-    max_attempts = 5
-
-    attempt = 0
-    while attempt < max_attempts:
-        cpu_usage = psutil.cpu_percent(interval=1)
-        mem_usage = psutil.virtual_memory().percent
-        if cpu_usage < cpu_threshold and mem_usage < mem_threshold:
-            return
-        print(f"[WARN] High usage - CPU: {cpu_usage}%, Mem: {mem_usage}% - GC Attempt {attempt+1}")
-        gc.collect()
-        attempt += 1
-        time.sleep(wait_time)
-    raise Exception("Resources too constrained after attempts.")
-
 def convert_nse_datetime(raw):
     try:
         dt = datetime.strptime(raw.strip(), "%d-%b-%Y %H:%M:%S")
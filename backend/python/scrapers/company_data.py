@@ -7,13 +7,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import concurrent.futures
-from datetime import datetime
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 from pyvirtualdisplay import Display
-from .common import (
-    log_debug, get_csv_path, append_unique_rows,
-    check_system_resources, load_portfolio_symbols,
-    remove_duplicates_from_csv_with_header, convert_nse_datetime
-)
+from .browser_pool import BrowserPool
+from .concurrency import AdaptiveLimiter
+from .nse_session import NSE_HEADERS, nse_session
+from . import deal_store
+from .common import log_debug, load_portfolio_symbols, convert_nse_datetime
 import os
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -27,6 +28,21 @@ ANNOUNCEMENTS_HEADERS = [
     "Stock", "Subject", "Announcement", "Attachment", "Time"
 ]
 
+# Long-lived browsers shared by the company workers; each is replaced after
+# BROWSER_MAX_USES companies or when it crashes
+COMPANY_WORKERS = 2
+BROWSER_MAX_USES = 20
+
+# Companies in flight, tuned between 1 and 6 by the concurrency monitor. Only
+# browser fallbacks hold a pooled driver, so this can exceed COMPANY_WORKERS.
+company_limiter = AdaptiveLimiter("company_data", COMPANY_WORKERS, minimum=1, maximum=6, hosts=("www.nseindia.com",))
+
+# JSON endpoints the NSE quote page loads its Announcements / Insider Trading tabs from
+NSE_ANNOUNCEMENTS_API = "https://www.nseindia.com/api/corporate-announcements"
+NSE_INSIDER_API = "https://www.nseindia.com/api/corporates-pit"
+NSE_QUOTE_URL = "https://www.nseindia.com/get-quotes/equity?symbol={symbol}"
+CORPORATE_LOOKBACK_DAYS = 182
+
 def create_driver():
     options = Options()
     options.add_argument("--no-first-run")
@@ -44,131 +60,208 @@ def create_driver():
     driver.set_page_load_timeout(30)
     return driver
 
-def scrape_company_data(company):
+def fetch_nse_corporate_json(url, company):
+    today = datetime.today()
+    params = {
+        "index": "equities",
+        "symbol": company,
+        "from_date": (today - timedelta(days=CORPORATE_LOOKBACK_DAYS)).strftime("%d-%m-%Y"),
+        "to_date": today.strftime("%d-%m-%Y"),
+    }
+    headers = dict(NSE_HEADERS, referer=NSE_QUOTE_URL.format(symbol=company))
+    response = nse_session.get(url, params=params, headers=headers, timeout=15)
+    response.raise_for_status()
+    data = response.json()
+    # corporate-announcements returns a bare list, corporates-pit wraps it in {"data": [...]}
+    return data.get("data", []) if isinstance(data, dict) else data
+
+def announcement_row(company, item):
+    return [
+        company,
+        item.get("desc", ""),
+        item.get("attchmntText") or "",
+        item.get("attchmntFile") or None,
+        convert_nse_datetime(item.get("an_dt") or ""),
+    ]
+
+def indian_number(value, decimals=0):
+    """Format like the NSE tables do (1,23,456.00) so API rows match scraped ones"""
+    try:
+        number = float(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return str(value) if value is not None else ""
+    int_part, _, frac = f"{abs(number):.{decimals}f}".partition('.')
+    head, tail = int_part[:-3], int_part[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    formatted = ','.join(groups + [tail]) + (f".{frac}" if frac else "")
+    return f"-{formatted}" if number < 0 else formatted
+
+def insider_row(company, item):
+    return [
+        company,
+        item.get("anex") or "",
+        item.get("acqName") or "",
+        item.get("secType") or "",
+        indian_number(item.get("secAcq")),
+        indian_number(item.get("secVal"), 2),
+        item.get("tdpTransactionType") or "",
+        item.get("xbrl") or None,
+        convert_nse_datetime(item.get("date") or ""),
+    ]
+
+def fetch_company_data_api(company):
+    """Announcements and insider trades for one symbol straight from NSE's JSON API"""
+    anns = [announcement_row(company, item) for item in fetch_nse_corporate_json(NSE_ANNOUNCEMENTS_API, company)]
+    its = [insider_row(company, item) for item in fetch_nse_corporate_json(NSE_INSIDER_API, company)]
+
+    if anns:
+        deal_store.insert_rows("announcements.csv", anns)
+    if its:
+        deal_store.insert_rows("insider_trading.csv", its)
+    print(f"[{company}] API: {len(anns)} announcements, {len(its)} insider trades")
+
+def scrape_company_data(company, pool):
+    try:
+        fetch_company_data_api(company)
+        return
+    except Exception as e:
+        log_debug(f"[{company}] NSE API fetch failed, falling back to browser: {e}")
+        print(f"[{company}] API fetch failed, using browser: {str(e)[:100]}")
+
     for attempt in range(3):
-        driver = None
         try:
             print(f"Starting scrape for: {company}")
-            check_system_resources()
-            driver = create_driver()
-            driver.get(f"https://www.nseindia.com/get-quotes/equity?symbol={company}")
-            wait = WebDriverWait(driver, 20)
+            with pool.driver() as driver:
+                scrape_company_pages(driver, company)
+            return
+        except Exception as e:
+            print(f"{company} attempt {attempt+1}/3 failed: {str(e)[:100]}")
+            time.sleep(2 ** attempt)
 
-            # ANNOUNCEMENTS
-            try:
-                ann_button = wait.until(EC.presence_of_element_located((By.ID, "announcements")))
-                if not ann_button.is_displayed():
-                    raise Exception("Announcements tab hidden or absent")
+def scrape_company_pages(driver, company):
+    driver.get(f"https://www.nseindia.com/get-quotes/equity?symbol={company}")
+    wait = WebDriverWait(driver, 20)
 
-                driver.execute_script("arguments[0].scrollIntoView(true);", ann_button)
-                wait.until(EC.element_to_be_clickable((By.ID, "announcements")))
-                driver.execute_script("arguments[0].click();", ann_button)
-                time.sleep(1)
+    # ANNOUNCEMENTS
+    try:
+        ann_button = wait.until(EC.presence_of_element_located((By.ID, "announcements")))
+        if not ann_button.is_displayed():
+            raise Exception("Announcements tab hidden or absent")
 
-                try:
-                    ten_button = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-val="6M"]')))
-                    driver.execute_script("arguments[0].click();", ten_button)
-                    time.sleep(1)
-                except Exception:
-                    print(f"[{company}] Could not select 6M filter")
-
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#corpAnnouncementTable tbody')))
-                readmores = driver.find_elements(By.CSS_SELECTOR, 'a.readMore')
-                for link in readmores:
-                    try:
-                        driver.execute_script("arguments[0].click();", link)
-                        time.sleep(0.2)
-                    except:
-                        continue
-
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                div = soup.find('div', id="corpAnnouncementTable")
-                anns = []
-                if div and div.find('tbody'):
-                    for row in div.find('tbody').find_all('tr'):
-                        tds = row.find_all("td")
-                        if len(tds) < 4:
-                            continue
-                        ann = [company]
-                        ann.append(tds[0].get_text(strip=True))
-                        span = tds[1].find("span")
-                        ann.append(span.get_text(strip=True) if span else tds[1].get_text(strip=True))
-                        a_tag = tds[2].find("a")
-                        ann.append(a_tag.get("href") if a_tag else None)
-                        for d in tds[3].find_all("div"):
-                            d.extract()
-                        time_val = tds[3].get_text(strip=True)
-                        ann.append(convert_nse_datetime(time_val))
-                        anns.append(ann)
-
-                    if anns:
-                        append_unique_rows("announcements.csv", anns, header=ANNOUNCEMENTS_HEADERS)
-                        print(f"[{company}] Announcements extracted: {len(anns)} records")
-                    else:
-                        print(f"[{company}] No announcements found")
-                else:
-                    print(f"[{company}] Announcements table missing")
-            except Exception as e:
-                print(f"[{company}] Announcements error: {str(e)[:150]}")
+        driver.execute_script("arguments[0].scrollIntoView(true);", ann_button)
+        wait.until(EC.element_to_be_clickable((By.ID, "announcements")))
+        driver.execute_script("arguments[0].click();", ann_button)
+        time.sleep(1)
+
+        try:
+            ten_button = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-val="6M"]')))
+            driver.execute_script("arguments[0].click();", ten_button)
+            time.sleep(1)
+        except Exception:
+            print(f"[{company}] Could not select 6M filter")
 
-            # INSIDER TRADING
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#corpAnnouncementTable tbody')))
+        readmores = driver.find_elements(By.CSS_SELECTOR, 'a.readMore')
+        for link in readmores:
             try:
-                it_button = wait.until(EC.presence_of_element_located((By.ID, "insiderTrading")))
-                if not it_button.is_displayed():
-                    raise Exception("Insider Trading tab hidden or absent")
-
-                driver.execute_script("arguments[0].scrollIntoView(true);", it_button)
-                wait.until(EC.element_to_be_clickable((By.ID, "insiderTrading")))
-                driver.execute_script("arguments[0].click();", it_button)
-                time.sleep(2)
-
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#corpInsiderTradingTable tbody')))
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                div = soup.find('div', id="corpInsiderTradingTable")
-                its = []
-                if div and div.find('tbody'):
-                    for row in div.find('tbody').find_all('tr'):
-                        tds = row.find_all('td')
-                        if len(tds) != 8:
-                            continue
-                        it = [company]
-                        for n in range(8):
-                            if n == 6 and tds[n].find('a'):
-                                it.append(tds[n].find('a').get("href"))
-                            elif n == 7:
-                                it.append(convert_nse_datetime(tds[n].get_text(strip=True)))
-                            else:
-                                it.append(tds[n].get_text(strip=True))
-                        its.append(it)
-
-                    if its:
-                        append_unique_rows("insider_trading.csv", its, header=INSIDER_HEADERS)
-                        print(f"[{company}] Insider Trading extracted: {len(its)} records")
+                driver.execute_script("arguments[0].click();", link)
+                time.sleep(0.2)
+            except:
+                continue
+
+        soup = BeautifulSoup(driver.page_source, "html.parser")
+        div = soup.find('div', id="corpAnnouncementTable")
+        anns = []
+        if div and div.find('tbody'):
+            for row in div.find('tbody').find_all('tr'):
+                tds = row.find_all("td")
+                if len(tds) < 4:
+                    continue
+                ann = [company]
+                ann.append(tds[0].get_text(strip=True))
+                span = tds[1].find("span")
+                ann.append(span.get_text(strip=True) if span else tds[1].get_text(strip=True))
+                a_tag = tds[2].find("a")
+                ann.append(a_tag.get("href") if a_tag else None)
+                for d in tds[3].find_all("div"):
+                    d.extract()
+                time_val = tds[3].get_text(strip=True)
+                ann.append(convert_nse_datetime(time_val))
+                anns.append(ann)
+
+            if anns:
+                deal_store.insert_rows("announcements.csv", anns)
+                print(f"[{company}] Announcements extracted: {len(anns)} records")
+            else:
+                print(f"[{company}] No announcements found")
+        else:
+            print(f"[{company}] Announcements table missing")
+    except Exception as e:
+        print(f"[{company}] Announcements error: {str(e)[:150]}")
+
+    # INSIDER TRADING
+    try:
+        it_button = wait.until(EC.presence_of_element_located((By.ID, "insiderTrading")))
+        if not it_button.is_displayed():
+            raise Exception("Insider Trading tab hidden or absent")
+
+        driver.execute_script("arguments[0].scrollIntoView(true);", it_button)
+        wait.until(EC.element_to_be_clickable((By.ID, "insiderTrading")))
+        driver.execute_script("arguments[0].click();", it_button)
+        time.sleep(2)
+
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#corpInsiderTradingTable tbody')))
+        soup = BeautifulSoup(driver.page_source, "html.parser")
+        div = soup.find('div', id="corpInsiderTradingTable")
+        its = []
+        if div and div.find('tbody'):
+            for row in div.find('tbody').find_all('tr'):
+                tds = row.find_all('td')
+                if len(tds) != 8:
+                    continue
+                it = [company]
+                for n in range(8):
+                    if n == 6 and tds[n].find('a'):
+                        it.append(tds[n].find('a').get("href"))
+                    elif n == 7:
+                        it.append(convert_nse_datetime(tds[n].get_text(strip=True)))
                     else:
-                        print(f"[{company}] No insider trading data found")
-                else:
-                    print(f"[{company}] Insider Trading table missing")
-            except Exception as e:
-                print(f"[{company}] Insider Trading error: {str(e)[:150]}")
-            return
-        except Exception as e:
-            print(f"{company} attempt {attempt+1}/3 failed: {str(e)[:100]}")
-            time.sleep(2 ** attempt)
-        finally:
-            if driver:
-                driver.quit()
+                        it.append(tds[n].get_text(strip=True))
+                its.append(it)
+
+            if its:
+                deal_store.insert_rows("insider_trading.csv", its)
+                print(f"[{company}] Insider Trading extracted: {len(its)} records")
+            else:
+                print(f"[{company}] No insider trading data found")
+        else:
+            print(f"[{company}] Insider Trading table missing")
+    except Exception as e:
+        print(f"[{company}] Insider Trading error: {str(e)[:150]}")
 
 def run_company_scrapers(only_new=False):
-    with Display(visible=0, size=(1920, 1080)):
+    # The container already runs under xvfb-run; only start a virtual display
+    # when there is no X server to talk to
+    display = nullcontext() if os.environ.get("DISPLAY") else Display(visible=0, size=(1920, 1080))
+    with display, BrowserPool(create_driver, size=COMPANY_WORKERS, max_uses=BROWSER_MAX_USES) as pool:
         start_time = time.time()
         companies = load_portfolio_symbols(only_new=only_new)
         if not companies:
             print("[WARN] No companies in portfolio, skipping company scraping")
             return
 
-        tasks = [lambda c=c: scrape_company_data(c) for c in companies]
+        def task(company):
+            with company_limiter.slot():
+                scrape_company_data(company, pool)
+
+        tasks = [lambda c=c: task(c) for c in companies]
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=company_limiter.maximum) as executor:
             futures = [executor.submit(task) for task in tasks]
             for future in concurrent.futures.as_completed(futures):
                 try:
@@ -176,10 +269,9 @@ def run_company_scrapers(only_new=False):
                 except:
                     pass
 
+        # The CSVs the frontend reads are regenerated once from the deal store
         for filename in ["announcements.csv", "insider_trading.csv"]:
-            full_path = get_csv_path(filename)
-            if os.path.exists(full_path):
-                remove_duplicates_from_csv_with_header(full_path)
+            deal_store.export_csv(filename)
 
         if only_new:
             if os.path.exists(USER_PORTFOLIO_CSV):
@@ -0,0 +1,236 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from statistics import median
+from urllib.parse import urlparse
+
+import psutil
+
+from .common import log_debug
+
+# === CONTROLLER SETTINGS ===
+TICK_SECONDS = 2.0
+STATS_WINDOW_SECONDS = 30.0
+MIN_SAMPLES = 5
+
+# Memory is this process's RSS as a percentage of RSS_LIMIT_MB (default: all RAM)
+RSS_LIMIT_MB = float(os.environ.get("SCRAPER_RSS_LIMIT_MB", 0)) or psutil.virtual_memory().total / 2**20
+
+# Back off above these, grow only below the lower pair
+CPU_HIGH, MEM_HIGH = 85.0, 85.0
+CPU_OK, MEM_OK = 70.0, 75.0
+
+ERROR_RATE_HIGH = 0.2
+LATENCY_FACTOR_HIGH = 2.0
+DECREASE_COOLDOWN = 10.0
+
+
+class HostStats:
+    """Rolling window of (time, ok, latency) for one host"""
+
+    def __init__(self):
+        self.samples = deque()
+        self.baseline = None
+        self.lock = threading.Lock()
+
+    def record(self, ok, latency):
+        now = time.monotonic()
+        with self.lock:
+            self.samples.append((now, ok, latency))
+            self._trim(now)
+
+    def _trim(self, now):
+        while self.samples and now - self.samples[0][0] > STATS_WINDOW_SECONDS:
+            self.samples.popleft()
+
+    def snapshot(self):
+        """(error_rate, median_latency, baseline_latency), or None with too few samples"""
+        with self.lock:
+            self._trim(time.monotonic())
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            errors = sum(1 for _, ok, _ in self.samples if not ok)
+            latency = median(lat for _, ok, lat in self.samples if ok) if errors < len(self.samples) else None
+            if latency is not None:
+                # Baseline follows the best latency seen, drifting up slowly
+                self.baseline = latency if self.baseline is None else min(latency, self.baseline * 1.05)
+            return errors / len(self.samples), latency, self.baseline
+
+
+_host_stats = {}
+_host_stats_lock = threading.Lock()
+
+
+def stats_for(url_or_host):
+    host = urlparse(url_or_host).netloc or url_or_host
+    with _host_stats_lock:
+        return _host_stats.setdefault(host, HostStats())
+
+
+def record_request(url, ok, latency):
+    """Called by the HTTP layers after every request"""
+    stats_for(url).record(ok, latency)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit for one pipeline, kept between `minimum` and `maximum`.
+    Work runs inside `with limiter.slot():` (or `async with limiter.slot_async():`).
+    Executors are sized to `maximum` and the limiter decides how many run.
+
+    The monitor halves the limit when the machine is overloaded or one of
+    `hosts` is erroring or slowing down, and adds one slot when the limit is
+    saturated and there is headroom.
+    """
+
+    def __init__(self, name, initial, minimum=1, maximum=None, hosts=()):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = max(minimum, min(initial, self.maximum))
+        self.hosts = tuple(hosts)
+        self.active = 0
+        self.denied = 0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+        self.async_waiters = deque()
+        monitor.register(self)
+
+    def _wake_async(self):
+        """Hand free slots to waiting coroutines; call with self.cond held"""
+        while self.async_waiters and self.active < self.limit:
+            loop, waiter = self.async_waiters.popleft()
+            self.active += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, waiter)
+            except RuntimeError:  # loop already closed
+                self.active -= 1
+
+    def _grant(self, waiter):
+        if waiter.done():
+            # Cancelled while its slot was on the way; pass the slot on
+            self._leave()
+        else:
+            waiter.set_result(None)
+
+    def _leave(self):
+        with self.cond:
+            self.active -= 1
+            self._wake_async()
+            self.cond.notify()
+
+    @contextmanager
+    def slot(self):
+        monitor.start()
+        with self.cond:
+            while self.active >= self.limit:
+                self.denied += 1
+                self.cond.wait()
+            self.active += 1
+        try:
+            yield
+        finally:
+            self._leave()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        monitor.start()
+        waiter = None
+        with self.cond:
+            if self.active < self.limit and not self.async_waiters:
+                self.active += 1
+            else:
+                self.denied += 1
+                loop = asyncio.get_running_loop()
+                waiter = loop.create_future()
+                self.async_waiters.append((loop, waiter))
+        if waiter is not None:
+            try:
+                # Resolved by _leave/adjust with the slot already counted
+                await waiter
+            except asyncio.CancelledError:
+                with self.cond:
+                    for entry in self.async_waiters:
+                        if entry[1] is waiter:
+                            self.async_waiters.remove(entry)
+                            break
+                raise
+        try:
+            yield
+        finally:
+            self._leave()
+
+    def _host_trouble(self):
+        for host in self.hosts:
+            snapshot = stats_for(host).snapshot()
+            if not snapshot:
+                continue
+            error_rate, latency, baseline = snapshot
+            if error_rate > ERROR_RATE_HIGH:
+                return f"{host} error rate {error_rate:.0%}"
+            if latency and baseline and latency > baseline * LATENCY_FACTOR_HIGH:
+                return f"{host} latency {latency:.2f}s vs {baseline:.2f}s"
+        return None
+
+    def adjust(self, cpu, mem):
+        trouble = None
+        if cpu >= CPU_HIGH or mem >= MEM_HIGH:
+            trouble = f"CPU {cpu:.0f}% / RSS {mem:.0f}% of limit"
+        else:
+            trouble = self._host_trouble()
+
+        with self.cond:
+            now = time.monotonic()
+            old = self.limit
+            if trouble:
+                if now - self.last_decrease >= DECREASE_COOLDOWN:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self.last_decrease = now
+            elif (self.denied or self.async_waiters) and cpu < CPU_OK and mem < MEM_OK:
+                self.limit = min(self.maximum, self.limit + 1)
+            self.denied = 0
+            if self.limit != old:
+                self._wake_async()
+                self.cond.notify_all()
+                log_debug(f"[CONCURRENCY] {self.name}: {old} -> {self.limit}" + (f" ({trouble})" if trouble else ""))
+
+
+class ResourceMonitor:
+    """Daemon thread that samples CPU and process RSS and re-tunes every registered limiter"""
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.limiters = []
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def register(self, limiter):
+        with self.lock:
+            self.limiters.append(limiter)
+
+    def start(self):
+        """Start sampling on first use rather than at import"""
+        with self.lock:
+            if self.thread is None:
+                psutil.cpu_percent(interval=None)  # prime the non-blocking sampler
+                self.thread = threading.Thread(target=self._run, name="concurrency-monitor", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(TICK_SECONDS)
+            cpu = psutil.cpu_percent(interval=None)
+            mem = self.process.memory_info().rss / 2**20 / RSS_LIMIT_MB * 100
+            with self.lock:
+                limiters = list(self.limiters)
+            for limiter in limiters:
+                try:
+                    limiter.adjust(cpu, mem)
+                except Exception as e:
+                    log_debug(f"[CONCURRENCY] adjust failed for {limiter.name}: {e}")
+
+
+monitor = ResourceMonitor()
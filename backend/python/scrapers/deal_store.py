@@ -0,0 +1,177 @@
+import csv
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+
+from .common import get_csv_path, log_debug
+
+# === PATH SETUP ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(SCRIPT_DIR, "deals.db")
+
+# csv file -> (table, columns as in "sql scripts/setup_tables.sql", CSV header, date column or None)
+# Every column is part of the natural key, matching the old whole-row CSV dedupe.
+TABLES = {
+    "bulk_deals.csv": (
+        "bulk_deals",
+        ["Source", "Deal_Date", "Security_Name", "Client_Name", "Deal_Type", "Quantity", "Price"],
+        ["Source", "Deal Date", "Security Name", "Client Name", "Deal Type", "Quantity", "Price"],
+        "Deal_Date",
+    ),
+    "block_deals.csv": (
+        "block_deals",
+        ["Source", "Deal_Date", "Security_Name", "Client_Name", "Deal_Type", "Quantity", "Trade_Price"],
+        ["Source", "Deal Date", "Security Name", "Client Name", "Deal Type", "Quantity", "Trade Price"],
+        "Deal_Date",
+    ),
+    "announcements.csv": (
+        "announcements",
+        ["Stock", "Subject", "Announcement", "Attachment", "Time"],
+        ["Stock", "Subject", "Announcement", "Attachment", "Time"],
+        None,
+    ),
+    "insider_trading.csv": (
+        "insider_trading",
+        ["Stock", "Clause", "Name", "Type", "Amount", "Value", "Transaction", "Attachment", "Time"],
+        ["Stock", "Clause", "Name", "Type", "Amount", "Value", "Transaction", "Attachment", "Time"],
+        None,
+    ),
+}
+
+DEAL_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d")
+
+_db_lock = threading.Lock()
+_ready_tables = set()
+
+
+def _quote(name):
+    return f'"{name}"'
+
+
+def parse_deal_date(value):
+    """ISO date for sorting, parsed once at insert time ('' if unparseable)"""
+    for fmt in DEAL_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime("%Y-%m-%d")
+        except (ValueError, AttributeError):
+            continue
+    return ""
+
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _normalise(row, width):
+    """Stringify like csv.writer does (None -> '') so rows compare equal to their CSV form"""
+    values = ["" if v is None else str(v) for v in row][:width]
+    return values + [""] * (width - len(values))
+
+
+def _read_legacy_csv(path):
+    """Existing CSV rows; lines that aren't UTF-8 are decoded as cp1252"""
+    lines = []
+    with open(path, 'rb') as f:
+        for raw in f:
+            try:
+                lines.append(raw.decode('utf-8'))
+            except UnicodeDecodeError:
+                lines.append(raw.decode('cp1252', errors='replace'))
+    reader = csv.reader(lines)
+    next(reader, None)
+    return list(reader)
+
+
+def _ensure_table(conn, csv_filename):
+    table, columns, _, date_column = TABLES[csv_filename]
+    if table in _ready_tables:
+        return
+    cols = ", ".join(f"{_quote(c)} TEXT NOT NULL DEFAULT ''" for c in columns)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {cols}, Sort_Date TEXT NOT NULL DEFAULT '')")
+    conn.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_natural_key ON {table} "
+        f"({', '.join(_quote(c) for c in columns)})"
+    )
+    if date_column:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_sort_date ON {table} (Sort_Date, id)")
+
+    # One-time import of the CSV history the table replaces
+    empty = conn.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+    csv_path = get_csv_path(csv_filename)
+    if empty and os.path.isfile(csv_path):
+        imported = _insert(conn, csv_filename, _read_legacy_csv(csv_path))
+        log_debug(f"[DEAL STORE] Imported {imported} rows from {csv_filename}")
+    conn.commit()
+    _ready_tables.add(table)
+
+
+def _insert(conn, csv_filename, rows):
+    table, columns, _, date_column = TABLES[csv_filename]
+    date_index = columns.index(date_column) if date_column else None
+    records = []
+    for row in rows:
+        values = _normalise(row, len(columns))
+        sort_date = parse_deal_date(values[date_index]) if date_index is not None else ""
+        records.append(values + [sort_date])
+
+    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+    before = conn.total_changes
+    conn.executemany(
+        f"INSERT OR IGNORE INTO {table} ({', '.join(_quote(c) for c in columns)}, Sort_Date) "
+        f"VALUES ({placeholders})",
+        records,
+    )
+    return conn.total_changes - before
+
+
+def insert_rows(csv_filename, rows):
+    """Upsert a batch; cost depends on the batch, not the history. Returns rows added."""
+    with _db_lock:
+        conn = _connect()
+        try:
+            _ensure_table(conn, csv_filename)
+            inserted = _insert(conn, csv_filename, rows)
+            conn.commit()
+            return inserted
+        finally:
+            conn.close()
+
+
+def export_csv(csv_filename):
+    """
+    Rewrite the frontend CSV from the table: deals ordered by date, company
+    data in ingest order. Written to a temp file and swapped in atomically.
+    """
+    table, columns, header, date_column = TABLES[csv_filename]
+    order = "Sort_Date, id" if date_column else "id"
+    csv_path = get_csv_path(csv_filename)
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    # A temp file of its own: the scraper.py subprocess and the in-process
+    # company scrape can export the same CSV at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(csv_path), prefix=csv_filename + ".", suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            with _db_lock:
+                conn = _connect()
+                try:
+                    _ensure_table(conn, csv_filename)
+                    cursor = conn.execute(f"SELECT {', '.join(_quote(c) for c in columns)} FROM {table} ORDER BY {order}")
+                    writer = csv.writer(f)
+                    writer.writerow(header)
+                    writer.writerows(cursor)
+                finally:
+                    conn.close()
+            f.flush()
+            os.fchmod(f.fileno(), 0o644)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, csv_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from . import http_client
+from .common import log_debug
+
+# === PATH SETUP ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(SCRIPT_DIR, "fetch_cache.json")
+
+# Entries not seen again for this many seconds are dropped on save
+MAX_ENTRY_AGE = 7 * 24 * 3600
+
+_lock = threading.Lock()
+_entries = None
+
+
+class Page:
+    """
+    One listing page fetch. `changed` is False when the server answered 304
+    or the hashed section matches the last remembered fetch; `content` and
+    `text` are then not worth parsing.
+    """
+
+    def __init__(self, url, response, digest, changed):
+        self.url = url
+        self.response = response
+        self.status_code = response.status_code
+        self.digest = digest
+        self.changed = changed
+
+    @property
+    def content(self):
+        return self.response.content
+
+    @property
+    def text(self):
+        return self.response.text
+
+
+def _load():
+    global _entries
+    if _entries is None:
+        _entries = {}
+        if os.path.exists(CACHE_FILE):
+            try:
+                with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                    _entries = json.load(f)
+            except (OSError, ValueError) as e:
+                log_debug(f"[FETCH CACHE] Ignoring unreadable cache file: {e}")
+    return _entries
+
+
+def _save(entries):
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, CACHE_FILE)
+
+
+def section_digest(content, section=None):
+    """
+    Hash of the part of `content` (bytes) between the `section` markers
+    (start, end). A missing start marker hashes the whole body, a missing end
+    marker everything after the start.
+    """
+    if section:
+        start, end = section
+        begin = content.find(start.encode())
+        if begin >= 0:
+            stop = content.find(end.encode(), begin) if end else -1
+            content = content[begin:stop] if stop >= 0 else content[begin:]
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def fetch(url, section=None, **kwargs):
+    """
+    GET `url` through http_client with the ETag/Last-Modified saved for it and
+    return a Page. Call remember() with the pages once their records are
+    stored, so the next unchanged answer can be trusted and skipped.
+    """
+    with _lock:
+        entry = dict(_load().get(url, {}))
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = http_client.get(url, headers=headers, **kwargs)
+    if response.status_code == 304 and entry:
+        return Page(url, response, entry.get("hash"), changed=False)
+    if response.status_code != 200:
+        return Page(url, response, None, changed=True)
+
+    digest = section_digest(response.content, section)
+    return Page(url, response, digest, changed=digest != entry.get("hash"))
+
+
+def remember(pages):
+    """Save validators and hashes of fetched pages in one write"""
+    now = time.time()
+    with _lock:
+        entries = _load()
+        for page in pages:
+            if page.status_code == 304 and page.url in entries:
+                entries[page.url]["seen"] = now
+            elif page.status_code == 200:
+                entries[page.url] = {
+                    "etag": page.response.headers.get("ETag"),
+                    "last_modified": page.response.headers.get("Last-Modified"),
+                    "hash": page.digest,
+                    "seen": now,
+                }
+        for url in [u for u, e in entries.items() if now - e.get("seen", 0) > MAX_ENTRY_AGE]:
+            del entries[url]
+        _save(entries)
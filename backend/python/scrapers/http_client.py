@@ -0,0 +1,99 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import rate_limiter
+from .concurrency import record_request
+
+# (connect, read) seconds, applied when a caller passes no timeout
+DEFAULT_TIMEOUT = (5, 20)
+
+# Number of hosts to keep pools for, and keep-alive connections per host
+POOL_HOSTS = 32
+POOL_MAXSIZE = 16
+
+try:
+    import brotli  # noqa: F401  (lets urllib3 decode 'br' responses)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/138.0.0.0 Safari/537.36"
+    ),
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+
+# Connection errors and 500/502/504 are retried inside the adapter. 429 and
+# 503 are left to the caller so the per-host token bucket alone honours their
+# Retry-After (capped at rate_limiter.MAX_RETRY_AFTER); urllib3 would sleep
+# for any Retry-After it is sent, outside the bucket.
+RETRY_POLICY = Retry(
+    total=3,
+    connect=3,
+    read=2,
+    backoff_factor=0.5,
+    status_forcelist=(500, 502, 504),
+    allowed_methods=frozenset(["GET", "HEAD"]),
+    respect_retry_after_header=False,
+    raise_on_status=False,
+)
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = DEFAULT_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = requests.Session()
+    adapter = _TimeoutHTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=RETRY_POLICY,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_session():
+    """
+    Process-wide requests.Session: keep-alive pools per host, one cookie jar
+    for every scraper, default timeouts and retries, compressed responses.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+def get(url, **kwargs):
+    """
+    GET through the shared session, paced by the host's token bucket. A 429/503
+    response pauses that bucket for its Retry-After before being returned.
+    """
+    rate_limiter.acquire(url)
+    start = time.monotonic()
+    try:
+        response = get_session().get(url, **kwargs)
+    except requests.RequestException:
+        record_request(url, False, time.monotonic() - start)
+        raise
+    record_request(url, response.status_code < 500 and response.status_code != 429, time.monotonic() - start)
+    rate_limiter.honour_retry_after(url, response)
+    return response
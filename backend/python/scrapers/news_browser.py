@@ -0,0 +1,124 @@
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+
+from pyvirtualdisplay import Display
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from .browser_pool import BrowserPool
+
+# === SETTINGS ===
+# Paths inside the Docker image, used by the sites that need a real (non-headless) Chromium
+CHROME_BINARY_PATH = "/usr/bin/chromium"
+CHROMEDRIVER_PATH = "/usr/bin/chromedriver"
+
+PAGE_LOAD_TIMEOUT = 30
+SCRIPT_TIMEOUT = 30
+
+# Browsers kept alive per profile, and loans before a browser is restarted
+HEADLESS_BROWSERS = int(os.environ.get("NEWS_HEADLESS_BROWSERS", 3))
+DISPLAY_BROWSERS = int(os.environ.get("NEWS_DISPLAY_BROWSERS", 1))
+BROWSER_MAX_USES = 50
+
+# Listings are parsed from the DOM, so skip downloading images
+BROWSER_PREFS = {"profile.managed_default_content_settings.images": 2}
+
+_display = None
+_display_lock = threading.Lock()
+
+
+def ensure_display():
+    """
+    Start one virtual display for the whole process when there is no X
+    display. It is left running so browsers started from other threads never
+    see DISPLAY change under them.
+    """
+    global _display
+    with _display_lock:
+        if _display is None and not os.environ.get("DISPLAY"):
+            _display = Display(visible=0, size=(1920, 1080))
+            _display.start()
+
+
+def _apply_timeouts(driver):
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    return driver
+
+
+def create_headless_driver():
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--log-level=3")
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    options.add_experimental_option("prefs", BROWSER_PREFS)
+    return _apply_timeouts(webdriver.Chrome(options=options))
+
+
+def create_display_driver():
+    """Full Chromium on the virtual display, for sites that turn headless browsers away"""
+    ensure_display()
+    options = Options()
+    options.binary_location = CHROME_BINARY_PATH
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--window-size=1920,1080")
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    options.add_experimental_option("prefs", BROWSER_PREFS)
+    service = Service(executable_path=CHROMEDRIVER_PATH)
+    return _apply_timeouts(webdriver.Chrome(service=service, options=options))
+
+
+PROFILES = {
+    "headless": (create_headless_driver, HEADLESS_BROWSERS),
+    "display": (create_display_driver, DISPLAY_BROWSERS),
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(profile):
+    with _pools_lock:
+        if profile not in _pools:
+            factory, size = PROFILES[profile]
+            _pools[profile] = BrowserPool(factory, size=size, max_uses=BROWSER_MAX_USES)
+        return _pools[profile]
+
+
+@contextmanager
+def browser(profile="headless"):
+    """
+    Borrow a long-lived browser: `with news_browser.browser() as driver: ...`.
+    Browsers are shared by every news source, reset between loans, and
+    restarted when they crash or reach BROWSER_MAX_USES.
+    """
+    with _pool(profile).driver() as driver:
+        yield driver
+
+
+def load(driver, url):
+    """Open `url`; a page still loading after PAGE_LOAD_TIMEOUT is stopped and used as is"""
+    try:
+        driver.get(url)
+    except TimeoutException:
+        driver.execute_script("window.stop();")
+
+
+@atexit.register
+def close_all():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,71 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from . import news_store
+from .common import log_debug
+
+
+class NewsSource:
+    """
+    One news site. `fetch_candidates()` yields listing pages (HTML, or
+    whatever `parse()` understands) newest first, and `parse(candidate)`
+    turns one into `(records, stop)`. `run()` stops fetching as soon as a
+    page reaches articles older than `cutoff` or already in the news store.
+
+    Sources whose candidates come from several independent listings set
+    `stop_ends_run = False` and read the stop flag back from their yields:
+    `stop = yield page`.
+    """
+
+    name = None
+    max_age = timedelta(hours=24)
+    utc = False
+    stop_ends_run = True
+
+    @property
+    def cutoff(self):
+        """Oldest publish time still collected, evaluated on every run"""
+        now = datetime.now(timezone.utc) if self.utc else datetime.now()
+        return now - self.max_age
+
+    def fetch_candidates(self):
+        raise NotImplementedError
+
+    def parse(self, candidate):
+        raise NotImplementedError
+
+    def finalize(self):
+        """Hook run after new records are stored"""
+
+    def run(self, deadline=None):
+        """
+        Collect new records, store them in one batch and return how many were
+        added. `deadline` (time.monotonic()) stops fetching further pages.
+        """
+        records = []
+        seen_links = set()
+        candidates = self.fetch_candidates()
+        try:
+            candidate = next(candidates, None)
+            while candidate is not None:
+                batch, stop = self.parse(candidate)
+                for record in batch:
+                    if record["Link"] not in seen_links:
+                        seen_links.add(record["Link"])
+                        records.append(record)
+
+                if stop and self.stop_ends_run:
+                    break
+                if deadline is not None and time.monotonic() > deadline:
+                    log_debug(f"[NEWS] {self.name}: deadline reached, keeping {len(records)} records")
+                    break
+                try:
+                    candidate = candidates.send(stop)
+                except StopIteration:
+                    break
+        finally:
+            candidates.close()
+
+        added = news_store.insert_many(records) if records else 0
+        self.finalize()
+        return added
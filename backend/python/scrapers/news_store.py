@@ -0,0 +1,173 @@
+import csv
+import os
+import sqlite3
+import tempfile
+import threading
+
+from .common import log_debug
+
+# === PATH SETUP ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(SCRIPT_DIR, "news.db")
+CSV_FILE = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "..", "..", "frontend", "static", "assets", "csv", "news_repository.csv"))
+
+FIELDNAMES = ["Source", "Headline", "Link", "Category", "Time"]
+
+_local = threading.local()
+
+
+def _quote(name):
+    return f'"{name}"'
+
+
+def _ensure_table(conn):
+    cols = ", ".join(f"{_quote(c)} TEXT NOT NULL DEFAULT ''" for c in FIELDNAMES)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS news (id INTEGER PRIMARY KEY, {cols})")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS news_link ON news (Link)")
+    conn.execute("CREATE INDEX IF NOT EXISTS news_headline ON news (Headline)")
+    conn.commit()
+
+    # One-time import of the CSV the table replaces. IMMEDIATE serialises
+    # scrapers that start at the same time so only one of them imports.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM news)").fetchone()[0]
+        if empty and os.path.isfile(CSV_FILE):
+            with open(CSV_FILE, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+                rows = list(csv.DictReader(f))
+            # The CSV is newest-first; insert oldest first so ids follow age
+            imported = _insert(conn, reversed(rows))
+            log_debug(f"[NEWS STORE] Imported {imported} rows from news_repository.csv")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _connection():
+    """One connection per thread, reused for every lookup that thread makes"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _ensure_table(conn)
+        _local.conn = conn
+    return conn
+
+
+def _insert(conn, records):
+    values = [
+        tuple("" if record.get(c) is None else str(record.get(c)) for c in FIELDNAMES)
+        for record in records
+        if record.get("Link")
+    ]
+    before = conn.total_changes
+    conn.executemany(
+        f"INSERT OR IGNORE INTO news ({', '.join(_quote(c) for c in FIELDNAMES)}) "
+        f"VALUES ({', '.join('?' for _ in FIELDNAMES)})",
+        values,
+    )
+    return conn.total_changes - before
+
+
+def insert_many(records):
+    """
+    Add scraped records (dicts keyed by FIELDNAMES, newest first as listed on
+    the site). Links already stored are ignored. Returns the number added.
+    """
+    conn = _connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Reversed so the first record gets the highest id and exports on top
+        inserted = _insert(conn, reversed(list(records)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted
+
+
+def has_link(link):
+    return _connection().execute("SELECT 1 FROM news WHERE Link = ?", (link,)).fetchone() is not None
+
+
+def has_headline(headline):
+    return _connection().execute("SELECT 1 FROM news WHERE Headline = ?", (headline,)).fetchone() is not None
+
+
+def records(source=None):
+    """Stored records as dicts, newest first, optionally for one source"""
+    query = f"SELECT {', '.join(_quote(c) for c in FIELDNAMES)} FROM news"
+    params = ()
+    if source is not None:
+        query += " WHERE Source = ?"
+        params = (source,)
+    cursor = _connection().execute(query + " ORDER BY id DESC", params)
+    return [dict(zip(FIELDNAMES, row)) for row in cursor]
+
+
+def _update(conn, updated):
+    conn.executemany(
+        "UPDATE news SET Category = ?, Time = ? WHERE Link = ?",
+        [(r["Category"], r["Time"], r["Link"]) for r in updated],
+    )
+
+
+def _delete(conn, links):
+    before = conn.total_changes
+    conn.executemany("DELETE FROM news WHERE Link = ?", [(link,) for link in links])
+    return conn.total_changes - before
+
+
+def update_records(updated):
+    """Write back Category/Time for records looked up by Link"""
+    apply_changes(updated, ())
+
+
+def delete_links(links):
+    return apply_changes((), links)
+
+
+def apply_changes(updated, deleted_links):
+    """
+    update_records() and delete_links() in one transaction. Returns the
+    number of rows deleted.
+    """
+    conn = _connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _update(conn, updated)
+        deleted = _delete(conn, deleted_links)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return deleted
+
+
+def export_csv():
+    """
+    Regenerate news_repository.csv for the frontend, newest first. Written to
+    a temp file and swapped in so readers never see a half-written file.
+    """
+    os.makedirs(os.path.dirname(CSV_FILE), exist_ok=True)
+    # A temp file of its own, so exports from separate processes never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(CSV_FILE), prefix=os.path.basename(CSV_FILE) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            cursor = _connection().execute(
+                f"SELECT {', '.join(_quote(c) for c in FIELDNAMES)} FROM news ORDER BY id DESC"
+            )
+            writer = csv.writer(f)
+            writer.writerow(FIELDNAMES)
+            writer.writerows(cursor)
+            f.flush()
+            os.fchmod(f.fileno(), 0o644)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CSV_FILE)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
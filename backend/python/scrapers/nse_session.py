@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+import time
+
+from . import http_client
+from .common import log_debug
+
+# === PATH SETUP ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE_FILE = os.path.join(SCRIPT_DIR, "nse_cookies.json")
+
+NSE_HOME_URL = "https://www.nseindia.com/"
+NSE_DOMAIN = "nseindia.com"
+
+# Re-warm after this long even if NSE's cookies have not expired yet
+WARMUP_TTL = 20 * 60
+
+NSE_HEADERS = {
+    'accept': '*/*',
+    'accept-language': 'en-GB,en;q=0.5',
+    'priority': 'u=1, i',
+    'sec-ch-ua': '"Brave";v="137", "Chromium";v="137", "Not/A)Brand";v="24"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"windows"',
+    'sec-fetch-dest': 'empty',
+    'sec-fetch-mode': 'cors',
+    'sec-fetch-site': 'same-origin',
+    'sec-gpc': '1',
+    'user-agent': 'Mozilla/5.0'
+}
+
+
+class NSESessionManager:
+    """
+    Warms NSE cookies with one homepage visit and reuses them for every NSE
+    request until they expire, the TTL passes, or NSE answers 401/403.
+
+    Cookies live in the shared http_client session and are mirrored to
+    COOKIE_FILE, so the separate data scripts of one refresh cycle (scraper.py,
+    volume_reports.py) share a single warm-up.
+    """
+
+    def __init__(self, cookie_file=COOKIE_FILE, ttl=WARMUP_TTL):
+        self.cookie_file = cookie_file
+        self.ttl = ttl
+        self.warmed_at = 0.0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _nse_cookies(self):
+        return [
+            c for c in http_client.get_session().cookies
+            if c.domain.lstrip('.').endswith(NSE_DOMAIN)
+        ]
+
+    def _is_warm(self):
+        if time.time() - self.warmed_at >= self.ttl:
+            return False
+        cookies = self._nse_cookies()
+        return bool(cookies) and not any(c.is_expired() for c in cookies)
+
+    def _load(self):
+        if not os.path.exists(self.cookie_file):
+            return
+        try:
+            with open(self.cookie_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log_debug(f"[NSE SESSION] Ignoring unreadable cookie file: {e}")
+            return
+        if time.time() - data.get("warmed_at", 0) >= self.ttl:
+            return
+        jar = http_client.get_session().cookies
+        for c in data.get("cookies", []):
+            jar.set(c["name"], c["value"], domain=c["domain"], path=c["path"],
+                    expires=c["expires"], secure=c["secure"])
+        self.warmed_at = data["warmed_at"]
+
+    def _save(self):
+        cookies = [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+             "expires": c.expires, "secure": c.secure}
+            for c in self._nse_cookies()
+        ]
+        tmp_path = self.cookie_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"warmed_at": self.warmed_at, "cookies": cookies}, f)
+        os.replace(tmp_path, self.cookie_file)
+
+    def warm(self, stale_before=None):
+        """
+        Visit the NSE homepage for fresh cookies. With stale_before set, only
+        re-warm if nobody else has done so since that time (401/403 refresh).
+        """
+        with self.lock:
+            if stale_before is None:
+                if self._is_warm():
+                    return
+            elif self.warmed_at > stale_before:
+                return
+
+            response = http_client.get(NSE_HOME_URL, headers=NSE_HEADERS, timeout=10)
+            log_debug(f"[NSE SESSION] Homepage GET status={response.status_code}")
+            if not response.ok:
+                return
+            self.warmed_at = time.time()
+            try:
+                self._save()
+            except OSError as e:
+                log_debug(f"[NSE SESSION] Could not save cookies: {e}")
+
+    def get(self, url, **kwargs):
+        """GET an NSE URL with warm cookies, re-warming once on 401/403"""
+        self.warm()
+        started = time.time()
+        response = http_client.get(url, **kwargs)
+        if response.status_code in (401, 403):
+            log_debug(f"[NSE SESSION] {response.status_code} from {url}, refreshing cookies")
+            self.warm(stale_before=started)
+            response = http_client.get(url, **kwargs)
+        return response
+
+
+nse_session = NSESessionManager()
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# === PER-HOST LIMITS ===
+# (requests per minute, burst size). Hosts not listed use DEFAULT_LIMIT.
+HOST_LIMITS = {
+    "www.screener.in": (25, 8),
+    "query1.finance.yahoo.com": (3000, 50),
+    "www.nseindia.com": (180, 10),
+    "nsearchives.nseindia.com": (60, 5),
+    "www.bseindia.com": (60, 5),
+    "api.bseindia.com": (60, 5),
+}
+DEFAULT_LIMIT = (120, 10)
+
+# Back-off used when a 429/503 carries no usable Retry-After header
+DEFAULT_RETRY_AFTER = 10
+MAX_RETRY_AFTER = 300
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket (GCRA form). Callers reserve a slot under the lock
+    and sleep outside it, so one waiting thread never blocks the others and
+    the long-run rate never exceeds rate_per_minute.
+    """
+
+    def __init__(self, rate_per_minute, burst):
+        self.interval = 60.0 / rate_per_minute
+        self.tolerance = (burst - 1) * self.interval
+        self.tat = time.monotonic()  # theoretical arrival time of the next request
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Claim the next slot and return how long to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.tat - self.tolerance)
+            self.tat = max(now, self.tat) + self.interval
+            return start - now
+
+    def try_acquire(self):
+        """Take a token only if one is available right now"""
+        with self.lock:
+            now = time.monotonic()
+            if now < self.tat - self.tolerance:
+                return False
+            self.tat = max(now, self.tat) + self.interval
+            return True
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def block_for(self, seconds):
+        """Hold every request for `seconds`, then resume at the steady rate without a burst"""
+        with self.lock:
+            until = time.monotonic() + seconds
+            self.tat = max(self.tat, until + self.tolerance)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _host(url_or_host):
+    return urlparse(url_or_host).netloc or url_or_host
+
+
+def bucket_for(url_or_host):
+    """Shared bucket for a URL's host, created on first use"""
+    host = _host(url_or_host)
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(*HOST_LIMITS.get(host, DEFAULT_LIMIT))
+            _buckets[host] = bucket
+        return bucket
+
+
+def acquire(url):
+    bucket_for(url).acquire()
+
+
+async def acquire_async(url):
+    await bucket_for(url).acquire_async()
+
+
+def try_acquire(url):
+    return bucket_for(url).try_acquire()
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def honour_retry_after(url, response, default=DEFAULT_RETRY_AFTER):
+    """
+    If the response is a 429/503, pause the host's bucket for the server's
+    Retry-After (or `default`). Returns the seconds blocked, 0 otherwise.
+    """
+    if response.status_code not in (429, 503):
+        return 0
+    seconds = parse_retry_after(response.headers.get("Retry-After"))
+    if seconds is None:
+        seconds = default
+    seconds = min(seconds, MAX_RETRY_AFTER)
+    bucket_for(url).block_for(seconds)
+    return seconds
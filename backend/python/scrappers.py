@@ -1,55 +1,37 @@
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 import time
-import random
 import re
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 from threading import Lock
 import sys
 import os
-from collections import deque
 from datetime import datetime
+from urllib.parse import quote
+from market_cap_cache import MarketCapCache, ScreenerResolutionIndex
+from scrapers import http_client
+from scrapers.concurrency import AdaptiveLimiter
+
+# === PATH SETUP ===
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "..", "csv"))
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Aggressive but safe rate limiting
-class AggressiveRateLimiter:
-    def __init__(self, max_requests_per_minute=25, burst_size=8):
-        self.max_requests_per_minute = max_requests_per_minute
-        self.burst_size = burst_size
-        self.request_times = deque()
-        self.lock = Lock()
-        
-    def wait_if_needed(self):
-        """Aggressive but smart rate limiting"""
-        with self.lock:
-            now = time.time()
-            
-            # Remove requests older than 1 minute
-            while self.request_times and now - self.request_times[0] > 60:
-                self.request_times.popleft()
-            
-            # Check if we're at burst limit (short term)
-            recent_requests = [t for t in self.request_times if now - t < 10]  # Last 10 seconds
-            if len(recent_requests) >= self.burst_size:
-                sleep_time = 2.0
-                time.sleep(sleep_time)
-            
-            # Check if we're at rate limit (long term)
-            elif len(self.request_times) >= self.max_requests_per_minute:
-                sleep_time = 60 - (now - self.request_times[0]) + 1
-                logger.warning(f"⏳ Rate limit reached. Brief pause: {sleep_time:.1f}s")
-                time.sleep(min(sleep_time, 10))  # Cap at 10 seconds
-            
-            # Record this request
-            self.request_times.append(now)
+# Screener workers in flight, tuned between 1 and 8 by the concurrency monitor
+market_cap_limiter = AdaptiveLimiter("market_cap", 4, minimum=1, maximum=8, hosts=("www.screener.in",))
+
+# Guards the per-run market cap memo shared by worker threads
+market_cap_memo_lock = Lock()
 
-# Global rate limiter
-rate_limiter = AggressiveRateLimiter(max_requests_per_minute=25, burst_size=8)
+# Persistent market cap cache shared across runs (stale entries refresh in background)
+market_cap_cache = MarketCapCache()
+
+# Which screener.in URL worked for each ticker (or that none did)
+screener_index = ScreenerResolutionIndex()
 
 def clean_ticker_for_screener(ticker):
     """Clean ticker symbol for screener.in URL"""
@@ -84,15 +66,27 @@ def parse_market_cap(market_cap_text):
     except:
         return None
 
-def get_market_cap_fast(symbol):
-    """Fast market cap retrieval with minimal delays"""
-    # Wait for rate limiting
-    rate_limiter.wait_if_needed()
-    
+def screener_url_candidates(company):
+    """screener.in URLs to try for a ticker, most likely first"""
+    slugs = [clean_ticker_for_screener(company)]
+    # Alternate spelling keeping '-' and '&' (e.g. BAJAJ-AUTO, M&M)
+    raw_slug = quote(company.upper().replace('.NS', '').replace('.BO', '').strip(), safe='-&')
+    if raw_slug and raw_slug not in slugs:
+        slugs.append(raw_slug)
+
+    urls = []
+    for slug in slugs:
+        urls.append(f"https://www.screener.in/company/{slug}/consolidated/")
+        urls.append(f"https://www.screener.in/company/{slug}/")
+    return urls
+
+def fetch_screener_market_cap(url):
+    """
+    Fetch one screener.in page and extract the market cap.
+    Returns (market_cap, status) where status is "ok" (page found),
+    "missing" (404) or "error" (anything worth retrying on a later run).
+    """
     try:
-        clean_symbol = clean_ticker_for_screener(symbol)
-        url = f"https://www.screener.in/company/{clean_symbol}/consolidated/"
-        
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -101,18 +95,18 @@ def get_market_cap_fast(symbol):
             'Upgrade-Insecure-Requests': '1',
         }
         
-        # Minimal delay - let rate limiter handle the timing
-        time.sleep(random.uniform(0.5, 1.2))
-        
-        response = requests.get(url, headers=headers, timeout=12)
+        # Shared session keeps screener.in connections alive; its token bucket
+        # paces requests (25/min, burst 8)
+        response = http_client.get(url, headers=headers, timeout=12)
         
-        if response.status_code == 429:
-            # Quick exponential backoff
-            time.sleep(random.uniform(8, 12))
-            response = requests.get(url, headers=headers, timeout=12)
+        if response.status_code in (429, 503):
+            # Bucket is paused for Retry-After; every worker waits it out, then retry once
+            response = http_client.get(url, headers=headers, timeout=12)
         
+        if response.status_code == 404:
+            return None, "missing"
         if response.status_code != 200:
-            return None
+            return None, "error"
         
         soup = BeautifulSoup(response.text, 'html.parser')
         
@@ -138,23 +132,72 @@ def get_market_cap_fast(symbol):
             if matches:
                 market_cap = parse_market_cap(matches[0])
         
-        if market_cap:
-            return market_cap
-        else:
-            return None
+        return (market_cap or None), "ok"
             
     except Exception as e:
+        return None, "error"
+
+def lookup_market_cap(company):
+    """
+    Fetch a company's market cap from screener.in. Once the resolution index
+    knows the working URL (or that there is none) this costs at most one request.
+    """
+    resolved_url, known_missing = screener_index.get(company)
+    if known_missing:
         return None
 
-def process_company_fast(row):
+    if resolved_url:
+        market_cap, status = fetch_screener_market_cap(resolved_url)
+        if market_cap or status == "error":
+            return market_cap
+        # The page moved or lost its market cap - probe the candidates again
+        screener_index.forget(company)
+
+    had_error = False
+    for url in screener_url_candidates(company):
+        if url == resolved_url:
+            continue
+        market_cap, status = fetch_screener_market_cap(url)
+        if market_cap:
+            screener_index.resolve(company, url)
+            return market_cap
+        had_error = had_error or status == "error"
+
+    # Only remember a negative result when every candidate answered definitively
+    if not had_error:
+        screener_index.mark_missing(company)
+    return None
+
+def get_cached_market_cap(company):
+    """Serve from the persistent cache, falling back to screener.in on a miss"""
+    cache_key = clean_ticker_for_screener(company)
+    market_cap, is_fresh = market_cap_cache.get(cache_key)
+    if market_cap is not None:
+        if not is_fresh:
+            market_cap_cache.refresh_async(cache_key, lambda: lookup_market_cap(company))
+        return market_cap
+
+    market_cap = lookup_market_cap(company)
+    if market_cap:
+        market_cap_cache.set(cache_key, market_cap)
+    return market_cap
+
+def process_company_fast(row, market_cap_memo=None):
     """Fast company processing"""
+    if market_cap_memo is None:
+        market_cap_memo = {}
     try:
         company = row['Company']
         
-        # Try both .NS and without extension
-        market_cap = get_market_cap_fast(f"{company}.NS")
-        if not market_cap:
-            market_cap = get_market_cap_fast(company)
+        # Reuse lookups from earlier dates in the same (backfill) run
+        with market_cap_memo_lock:
+            memoized = company in market_cap_memo
+            market_cap = market_cap_memo.get(company)
+        
+        if not memoized:
+            market_cap = get_cached_market_cap(company)
+            with market_cap_memo_lock:
+                market_cap_memo[company] = market_cap
         
         # Create result with all original columns plus market cap
         result = row.to_dict()
@@ -196,7 +239,7 @@ def find_input_file(target_date=None):
         try:
             date_obj = datetime.strptime(target_date, '%Y-%m-%d')
             formatted_date = date_obj.strftime('%d_%m_%Y')
-            date_specific_file = f"Enhanced_ATH_Analysis_with_threshold_{formatted_date}.csv"
+            date_specific_file = os.path.join(SCRIPT_DIR, f"Enhanced_ATH_Analysis_with_threshold_{formatted_date}.csv")
             
             if os.path.exists(date_specific_file):
                 print(f"✅ Found date-specific file: {date_specific_file}")
@@ -215,66 +258,47 @@ def find_input_file(target_date=None):
     ]
     
     for filename in fallback_files:
-        if os.path.exists(filename):
+        if os.path.exists(os.path.join(SCRIPT_DIR, filename)):
             print(f"✅ Found fallback file: {filename}")
-            return filename
+            return os.path.join(SCRIPT_DIR, filename)
     
     # If nothing found, list available CSV files
     print("❌ No suitable input file found!")
     print("📂 Available CSV files:")
-    csv_files = [f for f in os.listdir('.') if f.endswith('.csv') and 'Enhanced' in f]
+    csv_files = [f for f in os.listdir(SCRIPT_DIR) if f.endswith('.csv') and 'Enhanced' in f]
     for f in csv_files:
         print(f"   📄 {f}")
     
     return None
 
-def main():
-    """Main function with flexible date handling"""
-    
-    print("🚀 ULTRA-FAST ATH Analysis with Market Cap Integration")
-    print("=" * 70)
-    
-    # Handle command line arguments
-    target_date = None
-    if len(sys.argv) > 1:
-        target_date = sys.argv[1]
-        print(f"📅 Target date provided: {target_date}")
-    else:
-        print("📅 No date provided, using fallback file search")
-    
-    # Find the input file
-    input_file = find_input_file(target_date)
-    if not input_file:
-        print("❌ Cannot proceed without input file!")
-        sys.exit(1)
-    
-    # Load Enhanced ATH analysis data
-    try:
-        ath_df = pd.read_csv(input_file)
-        logger.info(f"📊 Loaded {len(ath_df)} companies from {input_file}")
-        
-        # Debug: Print column names to verify
-        logger.info(f"📋 Columns found: {list(ath_df.columns)}")
-        
-        # Show first few companies for verification
-        if len(ath_df) > 0:
-            print(f"🔍 First 3 companies: {ath_df['Company'].head(3).tolist()}")
-        
-    except Exception as e:
-        logger.error(f"❌ Error loading file {input_file}: {e}")
-        sys.exit(1)
-    
+def enrich_with_market_cap(ath_df, market_cap_memo=None, progress=None):
+    """
+    Add market cap and market cap category columns to an ATH DataFrame.
+    Pass the same market_cap_memo across calls to look each company up once.
+    progress(done, total) is called as companies complete.
+    """
+    if market_cap_memo is None:
+        market_cap_memo = {}
+    if ath_df.empty:
+        final_df = ath_df.copy()
+        final_df['Market Cap (Cr)'] = pd.Series(dtype='float64')
+        return add_market_cap_classification(final_df)
+
     start_time = time.time()
     
-    logger.info(f"🚀 Processing {len(ath_df)} companies with 4 threads...")
+    logger.info(f"🚀 Processing {len(ath_df)} companies with {market_cap_limiter.limit} threads (adaptive, max {market_cap_limiter.maximum})...")
     
     results = []
     
-    # More aggressive threading
-    with ThreadPoolExecutor(max_workers=4) as executor:
+    def task(row):
+        with market_cap_limiter.slot():
+            return process_company_fast(row, market_cap_memo)
+    
+    # Pool is sized to the limiter's ceiling; the limiter decides how many run
+    with ThreadPoolExecutor(max_workers=market_cap_limiter.maximum) as executor:
         # Submit all tasks
         future_to_company = {
-            executor.submit(process_company_fast, row): row['Company'] 
+            executor.submit(task, row): row['Company'] 
             for _, row in ath_df.iterrows()
         }
         
@@ -288,6 +312,8 @@ def main():
                 result = future.result()
                 results.append(result)
                 completed += 1
+                if progress:
+                    progress(completed, total)
                 
                 # Progress updates every 25 companies
                 if completed % 25 == 0 or completed == total:
@@ -309,6 +335,13 @@ def main():
                 except:
                     pass
     
+    # Persist newly fetched market caps and resolved URLs for the next run
+    try:
+        market_cap_cache.save()
+        screener_index.save()
+    except OSError as e:
+        logger.warning(f"⚠️ Could not save market cap cache: {e}")
+    
     # Create final DataFrame
     final_df = pd.DataFrame(results)
     
@@ -319,36 +352,39 @@ def main():
     final_df = final_df.sort_values(['Category', 'Market Cap (Cr)'], 
                                     ascending=[True, False], 
                                     na_position='last')
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    csv_dir = os.path.join(base_dir, "csv")
-    os.makedirs(csv_dir, exist_ok=True)
+    return final_df
+
+def save_market_cap_outputs(final_df, target_date=None, total_time=None):
+    """Write the market cap enriched ATH results and per-category files"""
+    os.makedirs(CSV_DIR, exist_ok=True)
     
     # Generate output filenames based on date
     if target_date:
-     try:
-        date_obj = datetime.strptime(target_date, '%Y-%m-%d')
-        formatted_date = date_obj.strftime('%d_%m_%Y')
-        main_output_file = f"ATH_companies_with_market_cap_{formatted_date}.csv"
-     except:
-        main_output_file = "ATH_companies_with_market_cap.csv"
+        try:
+            date_obj = datetime.strptime(target_date, '%Y-%m-%d')
+            formatted_date = date_obj.strftime('%d_%m_%Y')
+            main_output_file = f"ATH_companies_with_market_cap_{formatted_date}.csv"
+        except:
+            main_output_file = "ATH_companies_with_market_cap.csv"
     else:
-     main_output_file = "ATH_companies_with_market_cap.csv"
+        main_output_file = "ATH_companies_with_market_cap.csv"
 
     # Full path in /csv/
-     output_path = os.path.join(csv_dir, main_output_file)
+    output_path = os.path.join(CSV_DIR, main_output_file)
 
     # Save results
     final_df.to_csv(output_path, index=False)
     # Quick statistics
     valid_market_caps = final_df['Market Cap (Cr)'].dropna()
-    total_time = time.time() - start_time
     
     print("\n" + "="*70)
     logger.info("🎉 ULTRA-FAST PROCESSING COMPLETE!")
     logger.info("=" * 50)
-    logger.info(f"⏱️ Total time: {total_time/60:.1f} minutes")
-    logger.info(f"⚡ Processing rate: {len(final_df)/(total_time/60):.1f} companies/minute")
-    logger.info(f"📊 Success rate: {len(valid_market_caps)/len(final_df)*100:.1f}%")
+    if total_time and len(final_df):
+        logger.info(f"⏱️ Total time: {total_time/60:.1f} minutes")
+        logger.info(f"⚡ Processing rate: {len(final_df)/(total_time/60):.1f} companies/minute")
+    if len(final_df):
+        logger.info(f"📊 Success rate: {len(valid_market_caps)/len(final_df)*100:.1f}%")
     logger.info(f"✅ Companies with data: {len(valid_market_caps)}")
     logger.info(f"❌ Companies without data: {len(final_df) - len(valid_market_caps)}")
     
@@ -384,14 +420,65 @@ def main():
             else:
                 filename = f"{category_name}_with_market_cap.csv"
                 
-            category_data.to_csv(filename, index=False)
+            category_data.to_csv(os.path.join(SCRIPT_DIR, filename), index=False)
             logger.info(f"📁 Created: {filename}")
     
     logger.info(f"\n📁 Main results: {main_output_file}")
-    logger.info(f"🎯 Average time per company: {(total_time/len(final_df)):.1f} seconds")
+    if total_time and len(final_df):
+        logger.info(f"🎯 Average time per company: {(total_time/len(final_df)):.1f} seconds")
     
     if target_date:
         logger.info(f"📅 Analysis completed for date: {target_date}")
+    return main_output_file
+
+def process_date(target_date, market_cap_memo=None):
+    """Add market caps to one date's Enhanced ATH file and write the outputs"""
+    
+    # Find the input file
+    input_file = find_input_file(target_date)
+    if not input_file:
+        print("❌ Cannot proceed without input file!")
+        return False
+    
+    # Load Enhanced ATH analysis data
+    try:
+        ath_df = pd.read_csv(input_file)
+        logger.info(f"📊 Loaded {len(ath_df)} companies from {input_file}")
+        
+        # Debug: Print column names to verify
+        logger.info(f"📋 Columns found: {list(ath_df.columns)}")
+        
+        # Show first few companies for verification
+        if len(ath_df) > 0:
+            print(f"🔍 First 3 companies: {ath_df['Company'].head(3).tolist()}")
+        
+    except Exception as e:
+        logger.error(f"❌ Error loading file {input_file}: {e}")
+        return False
+    
+    start_time = time.time()
+    final_df = enrich_with_market_cap(ath_df, market_cap_memo)
+    save_market_cap_outputs(final_df, target_date, time.time() - start_time)
+    return True
+
+def main():
+    """Main function with flexible date handling"""
+    
+    print("🚀 ULTRA-FAST ATH Analysis with Market Cap Integration")
+    print("=" * 70)
+    
+    # Handle command line arguments; several dates may be passed by a backfill
+    target_dates = sys.argv[1:]
+    if target_dates:
+        print(f"📅 Target date(s) provided: {', '.join(target_dates)}")
+    else:
+        print("📅 No date provided, using fallback file search")
+        target_dates = [None]
+    
+    market_cap_memo = {}
+    failed = [d for d in target_dates if not process_date(d, market_cap_memo)]
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,8 +1,12 @@
 import os
-import requests
+import sys
 from datetime import datetime, timedelta
 import pandas as pd
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scrapers.nse_session import nse_session
+
 # === BASE DIRECTORY ===
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_CSV_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, "../../frontend/static/assets/csv"))
@@ -47,7 +51,8 @@ def check_downloads(dates):
                 "Accept-Language": "en-US,en;q=0.9",
             }
 
-            response = requests.get(csv_url, headers=headers)
+            # Same warmed NSE cookies as the bulk/block fetchers
+            response = nse_session.get(csv_url, headers=headers, timeout=(5, 60))
 
             if response.status_code == 200:
                 with open(local_csv_path, "wb") as f:
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+
+import httpx
+import pandas as pd
+
+from scrapers import rate_limiter
+from scrapers.concurrency import AdaptiveLimiter, record_request
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# === ASYNC FETCH SETTINGS ===
+DEFAULT_CONCURRENCY = 32
+MAX_CONCURRENCY = 64
+REQUEST_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# httpx logs every request at INFO; keep a 2000-symbol run readable
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# In-flight chart downloads, tuned between 4 and MAX_CONCURRENCY by the monitor
+yahoo_limiter = AdaptiveLimiter(
+    "yahoo", DEFAULT_CONCURRENCY, minimum=4, maximum=MAX_CONCURRENCY,
+    hosts=("query1.finance.yahoo.com",)
+)
+
+
+def to_unix(period):
+    """Accept 'YYYY-MM-DD', a Timestamp or an int and return UNIX seconds"""
+    if isinstance(period, str):
+        return int(datetime.strptime(period, "%Y-%m-%d").timestamp())
+    if isinstance(period, pd.Timestamp):
+        return int(period.timestamp())
+    return period
+
+
+def chart_params(period1, period2):
+    return {
+        'period1': to_unix(period1),
+        'period2': to_unix(period2),
+        'interval': '1d',
+        'includePrePost': 'true',
+        'events': 'div,split'
+    }
+
+
+def parse_chart(data):
+    """
+    Yahoo chart JSON -> OHLCV DataFrame indexed by Date (empty if no result).
+    Split dates in the response are listed in df.attrs['splits'].
+    """
+    if 'chart' in data and data['chart']['result']:
+        result = data['chart']['result'][0]
+        timestamps = result['timestamp']
+        ohlcv = result['indicators']['quote'][0]
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(timestamps, unit='s'),
+            'Open': ohlcv['open'],
+            'High': ohlcv['high'],
+            'Low': ohlcv['low'],
+            'Close': ohlcv['close'],
+            'Volume': ohlcv['volume']
+        }).dropna()
+        df.set_index('Date', inplace=True)
+        # Split dates in the range; Yahoo has re-scaled every earlier close
+        splits = (result.get('events') or {}).get('splits') or {}
+        df.attrs['splits'] = sorted(pd.to_datetime([int(s['date']) for s in splits.values()], unit='s'))
+        return df
+    return pd.DataFrame()
+
+
+def create_async_client(concurrency=DEFAULT_CONCURRENCY):
+    """HTTP/2 client whose keep-alive pool is sized to the concurrency limit"""
+    return httpx.AsyncClient(
+        http2=True,
+        headers=YAHOO_HEADERS,
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    )
+
+
+async def fetch_chart_async(client, symbol, period1, period2):
+    """
+    Download one symbol's daily chart. Transport errors, timeouts, 429 and
+    5xx are retried with exponential backoff plus jitter.
+    Returns an empty DataFrame when the symbol has no data or retries run out.
+    """
+    url = YAHOO_CHART_URL.format(symbol=symbol)
+    params = chart_params(period1, period2)
+
+    error = None
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            await rate_limiter.acquire_async(url)
+            start = time.monotonic()
+            response = await client.get(url, params=params)
+        except httpx.TransportError as e:
+            record_request(url, False, time.monotonic() - start)
+            error = e
+        else:
+            record_request(url, response.status_code not in RETRY_STATUSES, time.monotonic() - start)
+            if response.status_code == 404:
+                return pd.DataFrame()
+            if response.status_code not in RETRY_STATUSES:
+                try:
+                    response.raise_for_status()
+                    return parse_chart(response.json())
+                except (httpx.HTTPStatusError, ValueError) as e:
+                    print(f"⚠️ Error fetching Yahoo data for {symbol}: {e}")
+                    return pd.DataFrame()
+            # Only an explicit Retry-After pauses every task; otherwise per-task backoff below
+            rate_limiter.honour_retry_after(url, response, default=0)
+            error = f"HTTP {response.status_code}"
+
+        if attempt < MAX_ATTEMPTS - 1:
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, RETRY_BASE_DELAY))
+
+    print(f"⚠️ Error fetching Yahoo data for {symbol} after {MAX_ATTEMPTS} attempts: {error}")
+    return pd.DataFrame()
+
+
+async def fetch_many_async(symbols, worker, limiter=yahoo_limiter, progress=None):
+    """
+    Run worker(client, symbol) for every symbol over one shared client, with
+    as many in flight as `limiter` currently allows. Returns {symbol: result};
+    a worker exception is stored as the symbol's result. progress(done, total)
+    fires per symbol.
+    """
+    results = {}
+
+    async with create_async_client(limiter.maximum) as client:
+        async def run(symbol):
+            async with limiter.slot_async():
+                try:
+                    return symbol, await worker(client, symbol)
+                except Exception as e:
+                    return symbol, e
+
+        tasks = [asyncio.create_task(run(symbol)) for symbol in symbols]
+        for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+            symbol, result = await task
+            results[symbol] = result
+            if progress:
+                progress(done, len(tasks))
+    return results